@@ -0,0 +1,293 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+# An append-only log of every change made to the allow/blocklists
+# Entries are buffered and written in batches from a thread,
+# and the log is split into segments which get rotated out once there are too many.
+# An index of where each id's entries are lets `history` read just those lines
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
+
+__all__ = ("AuditLog",)
+
+_log = logging.getLogger("redbot.jojocogs.advancedblacklist.audit")
+_segment_re = re.compile(r"audit-(\d+)\.jsonl")
+# NOTE (segment, byte offset)
+Location = Tuple[int, int]
+# NOTE where each id's entries are, and which segments have entries each id made
+Index = Tuple[Dict[str, List[Location]], Dict[str, Set[int]]]
+_T = TypeVar("_T")
+
+
+async def _in_thread(func: Callable[..., _T], *args: Any) -> _T:
+    # NOTE `asyncio.to_thread` is 3.9+
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+
+class AuditLog:
+    """An append-only, rotating log of changes to the lists
+
+    Arguments
+    ------------
+    path: the directory the segments are kept in
+    max_bytes: how big a segment can get before a new one is started
+    max_files: how many segments to keep, the oldest ones get deleted
+    delay: how long to wait for more entries before writing them
+    max_pending: how many entries can be waiting before they get written immediately
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_bytes: int = 4 * 1024**2,
+        max_files: int = 10,
+        delay: float = 2.0,
+        max_pending: int = 500,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.delay = delay
+        self.max_pending = max_pending
+        self._pending: List[Dict[str, Any]] = []
+        self._index: Dict[str, List[Location]] = {}
+        self._actors: Dict[str, Set[int]] = {}
+        self._segment = 0
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _file(self, segment: int) -> Path:
+        return self.path / f"audit-{segment:06d}.jsonl"
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(match[1])
+            for file in self.path.iterdir()
+            if (match := _segment_re.fullmatch(file.name))
+        )
+
+    def _scan(self, segment: int, index: Index) -> None:
+        entries, actors = index
+        offset = 0
+        with self._file(segment).open("rb") as fp:
+            for line in fp:
+                try:
+                    entry = json.loads(line)
+                    entry_id = entry["id"]
+                except (ValueError, KeyError):
+                    _log.warning(f"Skipping a broken line in audit segment {segment}")
+                else:
+                    entries.setdefault(entry_id, []).append((segment, offset))
+                    if (actor := entry.get("actor")) is not None:
+                        actors.setdefault(str(actor), set()).add(segment)
+                offset += len(line)
+
+    def _scan_many(self, segments: Iterable[int]) -> Index:
+        index: Index = ({}, {})
+        for segment in segments:
+            self._scan(segment, index)
+        return index
+
+    def _build_index(self) -> Tuple[Index, int]:
+        self.path.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        return self._scan_many(segments), segments[-1] if segments else 0
+
+    def _forget(self, segments: Set[int]) -> None:
+        """Drop everything the index has for these segments"""
+        for entry_id in list(self._index):
+            kept = [loc for loc in self._index[entry_id] if loc[0] not in segments]
+            if kept:
+                self._index[entry_id] = kept
+            else:
+                del self._index[entry_id]
+        for actor in list(self._actors):
+            self._actors[actor] -= segments
+            if not self._actors[actor]:
+                del self._actors[actor]
+
+    async def load(self) -> None:
+        """Index the segments on disk, this should be called before anything else"""
+        async with self._lock:
+            (self._index, self._actors), self._segment = await _in_thread(self._build_index)
+
+    def record(
+        self,
+        action: str,
+        list_type: str,
+        guild_id: Optional[int],
+        entry_id: str,
+        *,
+        actor: Optional[int],
+        previous: Optional[str] = None,
+        reason: Optional[str] = None,
+    ) -> None:
+        """Queue an entry to be written, this doesn't do any io"""
+        self._pending.append(
+            {
+                "ts": time.time(),
+                "action": action,
+                "list": list_type,
+                "scope": guild_id,
+                "id": entry_id,
+                "actor": actor,
+                "previous": previous,
+                "reason": reason,
+            }
+        )
+        if len(self._pending) >= self.max_pending:
+            self._flush_soon()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.delay, self._flush_soon)
+
+    def _flush_soon(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _write(
+        self, batch: List[Dict[str, Any]], segment: int
+    ) -> Tuple[List[Tuple[Dict[str, Any], Location]], int, List[int]]:
+        written: List[Tuple[Dict[str, Any], Location]] = []
+        first = segment
+        file = self._file(segment)
+        size = file.stat().st_size if file.exists() else 0
+        try:
+            fp = file.open("ab")
+            try:
+                for entry in batch:
+                    if fp.tell() >= self.max_bytes:
+                        fp.close()
+                        segment += 1
+                        fp = self._file(segment).open("ab")
+                    written.append((entry, (segment, fp.tell())))
+                    fp.write(json.dumps(entry).encode("utf-8") + b"\n")
+            finally:
+                fp.close()
+        except BaseException:
+            # NOTE the batch gets written again, so nothing of it can be left behind
+            with contextlib.suppress(OSError):
+                if file.exists():
+                    os.truncate(file, size)
+                for new in range(first + 1, segment + 1):
+                    self._file(new).unlink(missing_ok=True)
+            raise
+        removed = self._segments()[: -self.max_files]
+        for old in removed:
+            self._file(old).unlink(missing_ok=True)
+        return written, segment, removed
+
+    async def flush(self) -> None:
+        """Write every queued entry"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                written, self._segment, removed = await _in_thread(
+                    self._write, batch, self._segment
+                )
+            except Exception as e:
+                # NOTE anything recorded since goes after these, so the order is kept
+                self._pending[:0] = batch
+                _log.error(f"Failed to write {len(batch)} audit log entries", exc_info=e)
+                return
+            for entry, location in written:
+                self._index.setdefault(entry["id"], []).append(location)
+                if (actor := entry["actor"]) is not None:
+                    self._actors.setdefault(str(actor), set()).add(location[0])
+            if removed:
+                self._forget(set(removed))
+
+    def _read(self, locations: List[Location]) -> List[Dict[str, Any]]:
+        ret: List[Dict[str, Any]] = []
+        fp = None
+        current = None
+        try:
+            for segment, offset in locations:
+                if segment != current:
+                    if fp is not None:
+                        fp.close()
+                    fp, current = self._file(segment).open("rb"), segment
+                fp.seek(offset)
+                ret.append(json.loads(fp.readline()))
+        finally:
+            if fp is not None:
+                fp.close()
+        return ret
+
+    async def history(self, entry_id: str, *, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the latest `limit` entries for a user/role id, newest first"""
+        await self.flush()
+        async with self._lock:
+            locations = self._index.get(entry_id, [])[-limit:]
+            if not locations:
+                return []
+            entries = await _in_thread(self._read, locations)
+        return entries[::-1]
+
+    def _purge(self, entry_id: str, segments: List[int]) -> None:
+        for segment in segments:
+            file = self._file(segment)
+            tmp = file.with_suffix(".tmp")
+            with file.open("rb") as src, tmp.open("wb") as dst:
+                for line in src:
+                    try:
+                        entry = json.loads(line)
+                        entry["id"]
+                    except (ValueError, KeyError):
+                        # NOTE there's no telling who a broken line is about, so it's dropped
+                        _log.warning(f"Dropping a broken line in audit segment {segment}")
+                        continue
+                    if entry["id"] == entry_id:
+                        continue
+                    if entry.get("actor") == int(entry_id):
+                        entry["actor"] = None
+                        line = json.dumps(entry).encode("utf-8") + b"\n"
+                    dst.write(line)
+            tmp.replace(file)
+
+    async def purge(self, entry_id: str) -> None:
+        """Remove a user from the log, for data deletion requests"""
+        await self.flush()
+        async with self._lock:
+            # NOTE only the segments with entries about or made by the user are rewritten,
+            # and as the offsets in those change they're the only ones indexed again
+            segments = {loc[0] for loc in self._index.get(entry_id, ())}
+            segments |= self._actors.get(entry_id, set())
+            if not segments:
+                return
+            await _in_thread(self._purge, entry_id, sorted(segments))
+            entries, actors = await _in_thread(self._scan_many, sorted(segments))
+            self._forget(segments)
+            for key, locations in entries.items():
+                self._index.setdefault(key, []).extend(locations)
+                self._index[key].sort()
+            for key, found in actors.items():
+                self._actors.setdefault(key, set()).update(found)
+
+    async def close(self) -> None:
+        # NOTE these are waited on rather than cancelled, a cancelled flush would leave its
+        # thread writing to the segment while the last flush starts writing to it as well
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
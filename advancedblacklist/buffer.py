@@ -0,0 +1,183 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple, Union
+
+import discord
+from redbot.core import Config
+
+from ._types import _WhiteBlacklist
+
+__all__ = ("WriteBuffer",)
+
+_log = logging.getLogger("redbot.jojocogs.advancedblacklist.buffer")
+_Key = Tuple[Optional[int], _WhiteBlacklist]
+
+
+class _Pending:
+    __slots__ = ("cleared", "changes", "expiries")
+
+    def __init__(self):
+        self.cleared: bool = False
+        # NOTE a value of `None` means the entry (or its expiry) should be removed
+        self.changes: Dict[str, Optional[str]] = {}
+        self.expiries: Dict[str, Optional[float]] = {}
+
+
+class WriteBuffer:
+    """Merges list mutations and writes them to config in one go
+
+    Every (scope, list type) pair gets at most one config transaction per flush for the list
+    and one for its expiries, no matter how many mutations were made to it in the meantime.
+    The cache is expected to already hold the changes, so reads don't need to wait
+    """
+
+    def __init__(self, config: Config, *, delay: float = 2.0):
+        self.config = config
+        self.delay = delay
+        self._pending: Dict[_Key, _Pending] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._held = 0
+
+    def _get(
+        self, white_black_list: _WhiteBlacklist, guild: Optional[Union[discord.Guild, int]]
+    ) -> _Pending:
+        key = (getattr(guild, "id", guild), white_black_list)
+        try:
+            pending = self._pending[key]
+        except KeyError:
+            pending = self._pending[key] = _Pending()
+        self._schedule()
+        return pending
+
+    def _schedule(self) -> None:
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._delayed_flush())
+
+    def _restore(self, key: _Key, item: _Pending) -> None:
+        # NOTE anything queued since the failed write is newer, so it goes on top
+        newer = self._pending.get(key)
+        if newer is None:
+            self._pending[key] = item
+            return
+        item.expiries.update(newer.expiries)
+        newer.expiries = item.expiries
+        if not newer.cleared:
+            item.changes.update(newer.changes)
+            newer.changes, newer.cleared = item.changes, item.cleared
+
+    def set_reasons(
+        self,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[Union[discord.Guild, int]],
+        data: Dict[str, str],
+    ) -> None:
+        self._get(white_black_list, guild).changes.update(data)
+
+    def remove(
+        self,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[Union[discord.Guild, int]],
+        ids: Iterable[str],
+    ) -> None:
+        self._get(white_black_list, guild).changes.update(dict.fromkeys(ids))
+
+    def set_expiries(
+        self,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[Union[discord.Guild, int]],
+        data: Dict[str, Optional[float]],
+    ) -> None:
+        """Queue `{id: timestamp}` expiries, where a timestamp of `None` removes it"""
+        self._get(white_black_list, guild).expiries.update(data)
+
+    def clear(
+        self, white_black_list: _WhiteBlacklist, guild: Optional[Union[discord.Guild, int]]
+    ) -> None:
+        pending = self._get(white_black_list, guild)
+        pending.cleared = True
+        pending.changes.clear()
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    @contextlib.asynccontextmanager
+    async def hold(self) -> AsyncIterator[None]:
+        """Don't write anything until the block exits, then write everything at once"""
+        self._held += 1
+        try:
+            yield
+        finally:
+            self._held -= 1
+            if not self._held:
+                await self.flush()
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.delay)
+        if self._held:
+            # NOTE `hold` will flush once it's released
+            return
+        # NOTE shielded so that `close` can't cancel a flush halfway through a write
+        await asyncio.shield(self.flush())
+        # NOTE mutations made during the flush and failed writes didn't get a timer of their own,
+        # as this one was still running when they were queued
+        self._timer = None
+        if self._pending:
+            self._schedule()
+
+    async def flush(self) -> None:
+        """|coro|
+
+        Write every pending mutation to config
+        """
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            for key, item in pending.items():
+                guild_id, white_black_list = key
+                scope = self.config.guild_from_id(guild_id) if guild_id else self.config
+                try:
+                    if item.cleared or item.changes:
+                        async with getattr(scope, white_black_list)() as data:
+                            if item.cleared:
+                                data.clear()
+                            for entry, reason in item.changes.items():
+                                if reason is None:
+                                    data.pop(entry, None)
+                                else:
+                                    data[entry] = reason
+                    if item.expiries:
+                        async with scope.expiries() as expiries:
+                            data = expiries.setdefault(white_black_list, {})
+                            for entry, when in item.expiries.items():
+                                if when is None:
+                                    data.pop(entry, None)
+                                else:
+                                    data[entry] = when
+                            if not data:
+                                del expiries[white_black_list]
+                except Exception as e:
+                    _log.error(
+                        f"Failed to write the {white_black_list} for {guild_id or 'global'}",
+                        exc_info=e,
+                    )
+                    self._restore(key, item)
+            if self._pending:
+                self._schedule()
+
+    async def close(self) -> None:
+        """|coro|
+
+        Stop the timer and write anything that's left
+        """
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        await self.flush()
+        # NOTE a failed write schedules a retry, which shouldn't outlive the cog
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
@@ -2,60 +2,240 @@ from __future__ import annotations
 
 import discord
 
-from typing import Optional
-from ._types import UserOrRole
+from typing import AbstractSet, Dict, FrozenSet, Iterator, Mapping, Optional, Set, Tuple, Union
+from ._types import UserOrRole, _WhiteBlacklist
 
 
 __all__ = ("Cache",)
 
+GuildOrId = Union[discord.Guild, int]
+
+
+def _guild_id(guild: Optional[GuildOrId]) -> Optional[int]:
+    return getattr(guild, "id", guild)
+
+
+def _as_id(user_or_role: UserOrRole) -> int:
+    return int(getattr(user_or_role, "id", user_or_role))
+
+
+def _members(data: Mapping[str, str]) -> Set[int]:
+    return set(map(int, data))
+
 
 class Cache:
+    """In memory copy of the block/allowlists
+
+    Alongside the `{id: reason}` dicts this keeps an integer keyed set
+    for every list so that membership checks are a single set lookup.
+    Adding to a list updates these in place, so the dicts handed out by the getters
+    are live and should be copied by anything that holds onto them across an await.
+
+    Lists that were checked against both config and core Red and found empty
+    are remembered as "known empty", which is different from a list that
+    simply hasn't been loaded yet
+    """
+
     def __init__(self):
         self.__bl_internal = {"global": {}, "guild": {}}
         self.__wl_internal = {"global": {}, "guild": {}}
+        self.__bl_members: dict = {"global": set(), "guild": {}}
+        self.__wl_members: dict = {"global": set(), "guild": {}}
+        self.__known_empty: Set[Tuple[str, Optional[int]]] = set()
+        self.__wl_index: Dict[int, Tuple[FrozenSet[int], FrozenSet[int]]] = {}
+        # NOTE id -> every (guild id or None, list type) that has the id
+        self.__reverse: Dict[int, Set[Tuple[Optional[int], str]]] = {}
 
-    def get_whitelist(self, guild: Optional[discord.Guild]) -> dict:
-        if guild:
-            return self.__wl_internal["guild"].get(guild.id, {})
+    def get_whitelist(self, guild: Optional[GuildOrId]) -> dict:
+        if (gid := _guild_id(guild)) is not None:
+            return self.__wl_internal["guild"].get(gid, {})
         return self.__wl_internal["global"]
 
-    def get_blacklist(self, guild: Optional[discord.Guild]) -> dict:
-        if guild:
-            return self.__bl_internal["guild"].get(guild.id, {})
+    def get_blacklist(self, guild: Optional[GuildOrId]) -> dict:
+        if (gid := _guild_id(guild)) is not None:
+            return self.__bl_internal["guild"].get(gid, {})
         return self.__bl_internal["global"]
 
-    def get_whitelist_user(self, guild: Optional[discord.Guild], user_or_role: UserOrRole) -> dict:
+    def get_whitelist_user(self, guild: Optional[GuildOrId], user_or_role: UserOrRole) -> dict:
         return self.get_whitelist(guild).get(str(getattr(user_or_role, "id", user_or_role)), {})
 
-    def get_blacklist_user(self, guild: Optional[discord.Guild], user_or_role: UserOrRole) -> dict:
+    def get_blacklist_user(self, guild: Optional[GuildOrId], user_or_role: UserOrRole) -> dict:
         return self.get_blacklist(guild).get(str(getattr(user_or_role, "id", user_or_role)), {})
 
-    def update_whitelist(self, guild: Optional[discord.Guild], data: dict) -> None:
-        if guild:
-            try:
-                self.__wl_internal["guild"][guild.id].update(data)
-            except KeyError:
-                self.__wl_internal["guild"][guild.id] = data
-            return
-        self.__wl_internal["global"].update(data)
-
-    def update_blacklist(self, guild: Optional[discord.Guild], data: dict) -> None:
-        if guild:
-            try:
-                self.__bl_internal["guild"][guild.id].update(data)
-            except KeyError:
-                self.__bl_internal["guild"][guild.id] = data
-            return
-        self.__bl_internal["global"].update(data)
+    def iter_lists(
+        self, white_black_list: _WhiteBlacklist
+    ) -> Iterator[Tuple[Optional[int], Dict[str, str]]]:
+        """Yield the global list followed by every non-empty guild list"""
+        internal = self.__wl_internal if white_black_list == "whitelist" else self.__bl_internal
+        yield None, internal["global"]
+        for gid, data in list(internal["guild"].items()):
+            if data:
+                yield gid, data
+
+    def whitelist_members(self, guild: Optional[GuildOrId]) -> AbstractSet[int]:
+        if (gid := _guild_id(guild)) is not None:
+            return self.__wl_members["guild"].get(gid, frozenset())
+        return self.__wl_members["global"]
+
+    def blacklist_members(self, guild: Optional[GuildOrId]) -> AbstractSet[int]:
+        if (gid := _guild_id(guild)) is not None:
+            return self.__bl_members["guild"].get(gid, frozenset())
+        return self.__bl_members["global"]
+
+    def whitelist_index(self, guild: discord.Guild) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        """Get the user ids and role ids on a guild's allowlist
+
+        This is built the first time it's asked for and thrown out whenever
+        the guild's allowlist changes
+        """
+        try:
+            return self.__wl_index[guild.id]
+        except KeyError:
+            pass
+        members = self.whitelist_members(guild)
+        roles = frozenset(i for i in members if guild.get_role(i) is not None)
+        ret = self.__wl_index[guild.id] = (frozenset(members) - roles, roles)
+        return ret
 
-    def clear_whitelist(self, guild: Optional[discord.Guild]) -> None:
-        if guild:
-            self.__wl_internal["guild"][guild.id] = {}
+    def lists_containing(self, user_or_role: UserOrRole) -> FrozenSet[Tuple[Optional[int], str]]:
+        """Get the `(guild id, list type)` of every list that has this user or role
+
+        The guild id is `None` for the global lists
+        """
+        return frozenset(self.__reverse.get(_as_id(user_or_role), ()))
+
+    def _reindex(
+        self, location: Tuple[Optional[int], str], old: AbstractSet[int], new: AbstractSet[int]
+    ) -> None:
+        for added in new - old:
+            self.__reverse.setdefault(added, set()).add(location)
+        for removed in old - new:
+            if (locations := self.__reverse.get(removed)) is None:
+                continue
+            locations.discard(location)
+            if not locations:
+                del self.__reverse[removed]
+
+    def in_whitelist(self, guild: Optional[GuildOrId], user_or_role: UserOrRole) -> bool:
+        return _as_id(user_or_role) in self.whitelist_members(guild)
+
+    def in_blacklist(self, guild: Optional[GuildOrId], user_or_role: UserOrRole) -> bool:
+        return _as_id(user_or_role) in self.blacklist_members(guild)
+
+    def is_known_empty(
+        self, white_black_list: _WhiteBlacklist, guild: Optional[GuildOrId]
+    ) -> bool:
+        return (white_black_list, _guild_id(guild)) in self.__known_empty
+
+    def mark_empty(self, white_black_list: _WhiteBlacklist, guild: Optional[GuildOrId]) -> None:
+        self.__known_empty.add((white_black_list, _guild_id(guild)))
+
+    def invalidate(self, white_black_list: _WhiteBlacklist, guild: Optional[GuildOrId]) -> None:
+        """Forget that a list is known to be empty"""
+        self.__known_empty.discard((white_black_list, _guild_id(guild)))
+
+    def _store(
+        self,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[GuildOrId],
+        data: Dict[str, str],
+    ) -> None:
+        if white_black_list == "whitelist":
+            internal, members = self.__wl_internal, self.__wl_members
+        else:
+            internal, members = self.__bl_internal, self.__bl_members
+        if data:
+            self.invalidate(white_black_list, guild)
+        new = _members(data)
+        if (gid := _guild_id(guild)) is not None:
+            if white_black_list == "whitelist":
+                self.__wl_index.pop(gid, None)
+            self._reindex((gid, white_black_list), members["guild"].get(gid, set()), new)
+            internal["guild"][gid] = data
+            members["guild"][gid] = new
             return
-        self.__wl_internal["global"] = {}
+        self._reindex((None, white_black_list), members["global"], new)
+        internal["global"] = data
+        members["global"] = new
 
-    def clear_blacklist(self, guild: Optional[discord.Guild]) -> None:
-        if guild:
-            self.__bl_internal["guild"][guild.id] = {}
+    def set_whitelist(self, guild: Optional[GuildOrId], data: Dict[str, str]) -> None:
+        """Replace the cached allowlist with `data`"""
+        self._store("whitelist", guild, dict(data))
+
+    def set_blacklist(self, guild: Optional[GuildOrId], data: Dict[str, str]) -> None:
+        """Replace the cached blocklist with `data`"""
+        self._store("blacklist", guild, dict(data))
+
+    def _update(
+        self,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[GuildOrId],
+        data: Mapping[str, str],
+    ) -> None:
+        if not data:
             return
-        self.__bl_internal["global"] = {}
+        if white_black_list == "whitelist":
+            internal, members = self.__wl_internal, self.__wl_members
+        else:
+            internal, members = self.__bl_internal, self.__bl_members
+        self.invalidate(white_black_list, guild)
+        if (gid := _guild_id(guild)) is not None:
+            if white_black_list == "whitelist":
+                self.__wl_index.pop(gid, None)
+            current = internal["guild"].setdefault(gid, {})
+            ids = members["guild"].setdefault(gid, set())
+        else:
+            current, ids = internal["global"], members["global"]
+        # NOTE only the new ids are touched, so adding a few entries to a
+        # big list doesn't copy or re-index the whole thing
+        location = (gid, white_black_list)
+        for key in data:
+            if (uid := int(key)) not in ids:
+                ids.add(uid)
+                self.__reverse.setdefault(uid, set()).add(location)
+        current.update(data)
+
+    def update_whitelist(self, guild: Optional[GuildOrId], data: Mapping[str, str]) -> None:
+        """Add or overwrite the entries in `data` on the cached allowlist"""
+        self._update("whitelist", guild, data)
+
+    def update_blacklist(self, guild: Optional[GuildOrId], data: Mapping[str, str]) -> None:
+        """Add or overwrite the entries in `data` on the cached blocklist"""
+        self._update("blacklist", guild, data)
+
+    def load(
+        self,
+        *,
+        whitelist: Dict[str, str],
+        blacklist: Dict[str, str],
+        guilds: Mapping[int, Mapping[str, Dict[str, str]]],
+    ) -> None:
+        """Replace the entire cache in one go
+
+        `guilds` should be the output of `Config.all_guilds`
+        """
+        self.__wl_internal = {"global": dict(whitelist), "guild": {}}
+        self.__bl_internal = {"global": dict(blacklist), "guild": {}}
+        self.__wl_members = {"global": _members(whitelist), "guild": {}}
+        self.__bl_members = {"global": _members(blacklist), "guild": {}}
+        self.__known_empty = set()
+        self.__wl_index = {}
+        self.__reverse = {}
+        self._reindex((None, "whitelist"), set(), self.__wl_members["global"])
+        self._reindex((None, "blacklist"), set(), self.__bl_members["global"])
+        for gid, data in guilds.items():
+            for internal, members, key in (
+                (self.__wl_internal, self.__wl_members, "whitelist"),
+                (self.__bl_internal, self.__bl_members, "blacklist"),
+            ):
+                if not (entries := data.get(key)):
+                    continue
+                internal["guild"][gid] = dict(entries)
+                members["guild"][gid] = ids = _members(entries)
+                self._reindex((gid, key), set(), ids)
+
+    def clear_whitelist(self, guild: Optional[GuildOrId]) -> None:
+        self._store("whitelist", guild, {})
+
+    def clear_blacklist(self, guild: Optional[GuildOrId]) -> None:
+        self._store("blacklist", guild, {})
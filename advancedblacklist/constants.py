@@ -23,9 +23,11 @@ config_structure: Final[Dict[str, Dict[str, ConfigType]]] = {
         "schema_v1": 1,
         "log_channel": None,
         "format": default_format,
+        "expiries": {},
     },
     "guild": {
         "blacklist": {},
         "whitelist": {},
+        "expiries": {},
     },
 }
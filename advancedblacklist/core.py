@@ -3,9 +3,29 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import io
+import itertools
 import logging
-from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Set, Tuple, Union
+import tempfile
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
+import aiohttp
 import contextlib
 import discord
 
@@ -16,6 +36,9 @@ except ImportError:
 
 from redbot.core import Config, commands
 from redbot.core.bot import Red
+from redbot.core.data_manager import cog_data_path
+from redbot.core.utils import AsyncIter
+from redbot.core.utils.chat_formatting import pagify
 
 from ._types import (
     _WhiteBlacklist,
@@ -23,35 +46,48 @@ from ._types import (
     UserOrRole,
     UsersOrRoles,
 )
+from .audit import AuditLog
+from .buffer import WriteBuffer
 from .cache import Cache
 from .constants import __author__, __version__, config_structure
-from .patching import Patch
-from .utils import _menus, Menu, Page, _timestamp, FormatView, get_source, ConfirmView
+from .expiry import ExpiryKey, ExpiryScheduler
+from .patching import BlocklistEvent, Patch
+from .template import Template, compile_format
+from .transfer import (
+    FileFormat,
+    ParseResult,
+    file_format,
+    iter_attachment_lines,
+    parse_records,
+    write_records,
+)
+from .utils import (
+    _menus,
+    Menu,
+    Page,
+    LazyPage,
+    _timestamp,
+    FormatView,
+    get_source,
+    ConfirmView,
+)
+
+try:
+    from cog_shared.jojo_utils.names import NameResolver
+except ImportError:
+    # NOTE ran from a clone of the repo instead of being installed with downloader
+    from jojo_utils.names import NameResolver
 
 __all___ = ("AdvancedBlacklist",)
 
 
 log = logging.getLogger("redbot.jojocogs.advancedblacklist")
 _original_commands = ["blocklist", "allowlist"]
-
-
-def _format_pages(show: List[str]) -> List[str]:
-    pages: List[str] = []
-    current_page: str = ""
-    for page in show:
-        current_page += f"\n{page}"
-        if len(current_page) > 1800:
-            pages.append(current_page)
-            current_page = ""
-    if current_page:
-        pages.append(current_page)
-    return pages
-
-
-def _format_str(string: str, replace: Dict[str, str]) -> str:
-    for key, value in replace.items():
-        string = string.replace(key, value)
-    return string
+_RECONCILE_BATCH = 100
+# NOTE set before each command is invoked so the audit log knows who made a change
+# without having to pass the author through every method. Changes made by core Red
+# or the expiry scheduler don't have one
+_actor: ContextVar[Optional[int]] = ContextVar("advancedblacklist_actor", default=None)
 
 
 async def _filter_internal(c: commands.Context, u: UsersOrRoles) -> Tuple[Set[int], Optional[str]]:
@@ -111,22 +147,24 @@ def _check_author(
     guild: discord.Guild,
     author: discord.Member,
     users_or_roles: UsersOrRoles,
-    current_whitelist: Set[UserOrRole],
+    current_whitelist: Tuple[FrozenSet[int], FrozenSet[int]],
     removing: bool = False,
 ) -> Optional[bool]:
     if guild.owner_id == author.id:
         return None
 
+    users, roles = current_whitelist
     uids = {getattr(u, "id", u) for u in users_or_roles}
+    changed_roles = {i for i in uids if guild.get_role(i) is not None}
+    changed_users = uids - changed_roles
     if removing:
-        theoretical = current_whitelist - uids
+        users, roles = users - changed_users, roles - changed_roles
     else:
-        theoretical = current_whitelist.union(uids)
-    log.debug(f"{theoretical = }, {uids = }")
-    ids = {i for i in (author.id, *(getattr(author, "_roles", [])))}
-    if theoretical and ids.isdisjoint(theoretical):
-        return False
-    return True
+        users, roles = users | changed_users, roles | changed_roles
+    log.debug(f"{users = }, {roles = }, {uids = }")
+    if not (users or roles):
+        return True
+    return author.id in users or not roles.isdisjoint(getattr(author, "_roles", ()))
 
 
 class AdvancedBlacklist(commands.Cog):
@@ -147,12 +185,19 @@ class AdvancedBlacklist(commands.Cog):
         del config_type, data
         self._original_coms: List[commands.Command] = []
         self._cache = Cache()
+        self._writer = WriteBuffer(self.config)
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._format: Dict[str, Template] = {}
+        self._expiry = ExpiryScheduler(self._remove_expired)
+        self._names = NameResolver.acquire(self.bot)
+        self._audit = AuditLog(cog_data_path(self) / "audit")
 
     @classmethod
     async def async_init(cls, bot: Red) -> Self:
         """NOTE only initialize an instance using this method"""
         self = cls(bot)
         await self._patch.startup()
+        self._patch.subscribe(self._on_blocklist_events, batch=True, delay=0.5)
         for name in _original_commands:
             local = "local" + name
             global_com = bot.remove_command(name)
@@ -163,13 +208,152 @@ class AdvancedBlacklist(commands.Cog):
             self._original_coms.append(global_com)
             self._original_coms.append(local_com)
         del name, local, global_com, local_com
+        await self._audit.load()
+        await self._warm_cache()
+        self._expiry.start()
         return self
 
+    async def _warm_cache(self) -> None:
+        """Load every list into the cache so `in_list` never has to touch config"""
+        start = time.perf_counter()
+        global_data = await self.config.all()
+        self._set_format(global_data["format"])
+        guilds = await self.config.all_guilds()
+        self._cache.load(
+            whitelist=global_data["whitelist"],
+            blacklist=global_data["blacklist"],
+            guilds=guilds,
+        )
+        self._load_expiries(None, global_data["expiries"])
+        for guild_id, guild_data in guilds.items():
+            self._load_expiries(guild_id, guild_data.get("expiries", {}))
+        log.debug(
+            f"Loaded the lists of {len(guilds)} guilds in {time.perf_counter() - start:.3f}s"
+        )
+        self._warmup_task = asyncio.create_task(self._reconcile_with_red())
+
+    async def _reconcile_with_red(self) -> None:
+        """Pull in anyone who was added through core Red and not through this cog,
+        and drop anyone who was removed through core Red"""
+        await self.bot.wait_until_red_ready()
+        start = time.perf_counter()
+        added = removed = 0
+        guilds: List[Optional[discord.Guild]] = [None, *self.bot.guilds]
+        async for guild in AsyncIter(guilds, steps=_RECONCILE_BATCH):
+            for list_type in ("whitelist", "blacklist"):
+                before = set(self._cache_list(list_type, guild))
+                red_ids = {str(i) for i in await getattr(self.bot, f"get_{list_type}")(guild)}
+                # NOTE the list could have been changed while Red was being asked,
+                # anything that was changed in the meantime is left as it is
+                current = self._cache_list(list_type, guild)
+                missing = {i for i in red_ids if i not in before and i not in current}
+                gone = {i for i in before if i in current and i not in red_ids}
+                if not (missing or gone):
+                    continue
+                data = {k: v for k, v in current.items() if k not in gone}
+                data.update(dict.fromkeys(missing, "No reason provided."))
+                self._set_cache(list_type, guild, data)
+                if missing:
+                    self._writer.set_reasons(
+                        list_type, guild, dict.fromkeys(missing, "No reason provided.")
+                    )
+                if gone:
+                    self._writer.remove(list_type, guild, gone)
+                    self._update_expiries(list_type, guild, gone)
+                    if not data:
+                        self._cache.mark_empty(list_type, guild)
+                added += len(missing)
+                removed += len(gone)
+        log.info(
+            f"AdvancedBlacklist warm-up finished in {time.perf_counter() - start:.3f}s, "
+            f"checked {len(guilds) - 1} guilds, imported {added} entries from core Red "
+            f"and removed {removed} that core Red no longer has"
+        )
+
+    def _load_expiries(
+        self, guild_id: Optional[int], expiries: Dict[str, Dict[str, float]]
+    ) -> None:
+        for list_type, entries in expiries.items():
+            for user_id, when in entries.items():
+                self._expiry.schedule((guild_id, list_type, user_id), when)
+
+    def _update_expiries(
+        self,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[Union[discord.Guild, int]],
+        ids: Iterable[str],
+        when: Optional[float] = None,
+    ) -> None:
+        """Schedule `ids` to be removed at `when`, or cancel their removal if `when` is `None`"""
+        guild_id: Optional[int] = getattr(guild, "id", guild)
+        if when is None:
+            # NOTE most entries don't expire, so only touch config for the ones that did
+            changed = [i for i in ids if self._expiry.cancel((guild_id, white_black_list, i))]
+        else:
+            changed = list(ids)
+            for user_id in changed:
+                self._expiry.schedule((guild_id, white_black_list, user_id), when)
+        if changed:
+            # NOTE this goes through the same buffer as the lists,
+            # so an entry and its expiry are always written together
+            self._writer.set_expiries(white_black_list, guild_id, dict.fromkeys(changed, when))
+
+    async def _remove_expired(self, keys: List[ExpiryKey]) -> None:
+        """Called by the expiry scheduler with every entry that's due"""
+
+        def key(k: ExpiryKey) -> Tuple[int, str]:
+            return k[0] or 0, k[1]
+
+        for (guild_id, list_type), group in itertools.groupby(sorted(keys, key=key), key=key):
+            if TYPE_CHECKING:
+                assert list_type in ("whitelist", "blacklist")
+            ids = [k[2] for k in group]
+            self._writer.set_expiries(list_type, guild_id or None, dict.fromkeys(ids))
+            guild: Optional[discord.Guild] = None
+            if guild_id:
+                # NOTE the bot might have left the guild, Red only needs the id anyway
+                guild = self.bot.get_guild(guild_id) or discord.Object(guild_id)  # type:ignore
+            current = self._cache_list(list_type, guild)
+            expired = [int(i) for i in ids if i in current]
+            if not expired:
+                continue
+            await self.remove_from_list(expired, white_black_list=list_type, guild=guild)
+            log.info(
+                f"Removed {len(expired)} expired entries from the "
+                f"{'local' if guild_id else 'global'} {list_type} {guild_id or ''}".rstrip()
+            )
+
+    def _set_format(self, settings: Dict[str, str]) -> None:
+        self._format = compile_format(settings)
+
+    def _cache_list(
+        self, white_black_list: _WhiteBlacklist, guild: Optional[Union[discord.Guild, int]]
+    ) -> Dict[str, str]:
+        return getattr(self._cache, f"get_{white_black_list}")(guild)
+
+    def _set_cache(
+        self,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[Union[discord.Guild, int]],
+        data: Dict[str, str],
+    ) -> None:
+        getattr(self._cache, f"set_{white_black_list}")(guild, data)
+
     async def cog_unload(self) -> None:
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+        self._expiry.stop()
+        self._names.release()
+        # NOTE the last events from Red get written too, so the writers are closed after this
         await self._patch.destroy()
+        await self._writer.close()
+        await self._audit.close()
         for com in self._original_coms:
             self.bot.add_command(com)
 
+    async def cog_before_invoke(self, ctx: commands.Context) -> None:
+        _actor.set(ctx.author.id)
+
     def format_help_for_context(self, ctx: commands.Context) -> str:
         original = super().format_help_for_context(ctx)
         return f"{original}\n\n" f"**Author:** {__author__}\n" f"**Version:** {__version__}\n"
@@ -184,27 +368,20 @@ class AdvancedBlacklist(commands.Cog):
             return
 
         # NOTE just gonna handle the reason parts
-        guilds = await self.config.all_guilds()
         actual = str(user_id)
-        for guild, guild_data in guilds.items():
+        # NOTE the user can be in the log without being on any list, as an actor or a removed entry
+        await self._audit.purge(actual)
+        locations = self._cache.lists_containing(user_id)
+        if not locations:
+            return
+        for guild_id, list_type in locations:
             if TYPE_CHECKING:
-                assert isinstance(guild_data, dict), "mypy"
-            for list_type, user_data in guild_data.items():
-                if actual in user_data:
-                    del user_data[actual]
-                if list_type == "whitelist":
-                    self._cache.update_whitelist(guild, user_data)
-                else:
-                    self._cache.update_blacklist(guild, user_data)
-
-        async with self.config.blacklist() as bl:
-            if actual in bl:
-                del bl[actual]
-                self._cache.update_blacklist(None, bl)
-        async with self.config.whitelist() as wl:
-            if actual in wl:
-                del wl[actual]
-                self._cache.update_whitelist(None, wl)
+                assert list_type in ("whitelist", "blacklist")
+            data = self._cache_list(list_type, guild_id)
+            self._set_cache(list_type, guild_id, {k: v for k, v in data.items() if k != actual})
+            self._writer.remove(list_type, guild_id, (actual,))
+            self._update_expiries(list_type, guild_id, (actual,))
+        await self._writer.flush()
 
     async def maybe_send_embed(
         self,
@@ -240,6 +417,7 @@ class AdvancedBlacklist(commands.Cog):
         reason: str,
         guild: Optional[discord.Guild] = None,
         override: bool = False,
+        expires_at: Optional[datetime] = None,
     ) -> None:
         """|coro|
 
@@ -252,23 +430,41 @@ class AdvancedBlacklist(commands.Cog):
         reason: `str` the reason the users/role were added
         guild: `discord.Guild` guild
         override: `bool` Don't add to the list, should only be used in listener methods
+        expires_at: `datetime` When to remove the users/roles again, defaults to never
         """
-        config = getattr((self.config.guild(guild) if guild else self.config), white_black_list)
         log.debug(f"Adding these users/roles to the blocklist.\n{users_or_roles = }, {reason =}")
 
-        async with config() as blacklist:
-            for item in users_or_roles:
-                actual = str(getattr(item, "id", item))
-                blacklist[actual] = reason
-                if white_black_list == "whitelist":
-                    self._cache.update_whitelist(guild, blacklist)
-                else:
-                    self._cache.update_blacklist(guild, blacklist)
-        del blacklist, item, actual
+        changes = {str(getattr(item, "id", item)): reason for item in users_or_roles}
+        await self._add_entries(
+            changes, white_black_list=white_black_list, guild=guild, override=override
+        )
+        # NOTE adding someone without an expiry makes them stay, even if they were added with one
+        self._update_expiries(
+            white_black_list, guild, changes, expires_at.timestamp() if expires_at else None
+        )
+
+    async def _add_entries(
+        self,
+        entries: Dict[str, str],
+        *,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[discord.Guild],
+        override: bool = False,
+    ) -> None:
+        """Add `{id: reason}` entries to a list, allowing for a different reason per entry"""
+        current = self._cache_list(white_black_list, guild)
+        self._record(
+            "add",
+            white_black_list,
+            guild,
+            ((k, current.get(k), v) for k, v in entries.items()),
+        )
+        getattr(self._cache, f"update_{white_black_list}")(guild, entries)
+        self._writer.set_reasons(white_black_list, guild, entries)
         if override:
             return
         coro = getattr(self.bot, f"add_to_{white_black_list}")
-        await coro(users_or_roles, guild=guild, adv_bl=True)
+        await coro([int(i) for i in entries], guild=guild, adv_bl=True)
 
     async def remove_from_list(
         self,
@@ -289,23 +485,24 @@ class AdvancedBlacklist(commands.Cog):
         guild: `discord.Guild` guild
         override: `bool` Don't remove from the list, should only be used in listener methods
         """
-        config = getattr((self.config.guild(guild) if guild else self.config), white_black_list)
         log.debug(
             f"Removing these users from the {white_black_list}\n{users_or_roles = }, {guild = }"
         )
 
-        async with config() as blacklist:
-            for item in users_or_roles:
-                actual = str(getattr(item, "id", item))
-                if actual not in blacklist:
-                    continue
-                del blacklist[actual]
-                if white_black_list == "whitelist":
-                    self._cache.update_whitelist(guild, blacklist)
-                else:
-                    self._cache.update_blacklist(guild, blacklist)
-
-        del blacklist, item, actual
+        removed = {str(getattr(item, "id", item)) for item in users_or_roles}
+        current = self._cache_list(white_black_list, guild)
+        self._record(
+            "remove",
+            white_black_list,
+            guild,
+            ((k, current[k], None) for k in removed if k in current),
+        )
+        blacklist = {k: v for k, v in current.items() if k not in removed}
+        self._set_cache(white_black_list, guild, blacklist)
+        if not blacklist:
+            self._cache.mark_empty(white_black_list, guild)
+        self._writer.remove(white_black_list, guild, removed)
+        self._update_expiries(white_black_list, guild, removed)
         if override:
             return
         await getattr(self.bot, f"remove_from_{white_black_list}")(
@@ -319,44 +516,40 @@ class AdvancedBlacklist(commands.Cog):
         guild: Optional[discord.Guild] = None,
         override: bool = False,
     ) -> None:
-        if white_black_list == "whitelist":
-            self._cache.clear_whitelist(guild)
-        else:
-            self._cache.clear_blacklist(guild)
+        current = self._cache_list(white_black_list, guild)
+        self._record("clear", white_black_list, guild, ((k, v, None) for k, v in current.items()))
+        self._update_expiries(white_black_list, guild, list(current))
+        getattr(self._cache, f"clear_{white_black_list}")(guild)
+        self._cache.mark_empty(white_black_list, guild)
         if override:
             return
 
-        if guild:
-            await getattr(self.config.guild(guild), white_black_list).clear()
-        else:
-            await getattr(self.config, white_black_list).clear()
+        self._writer.clear(white_black_list, guild)
         await getattr(self.bot, f"clear_{white_black_list}")(guild=guild, adv_bl=True)
 
     async def get_list(
         self, *, white_black_list: _WhiteBlacklist, guild: Optional[discord.Guild] = None
     ) -> Dict[str, str]:
-        if white_black_list == "whitelist":
-            blacklist = self._cache.get_whitelist(guild)
-        else:
-            blacklist = self._cache.get_blacklist(guild)
+        blacklist = self._cache_list(white_black_list, guild)
         if blacklist:
             return blacklist
+        elif self._cache.is_known_empty(white_black_list, guild):
+            return {}
         config = getattr((self.config.guild(guild) if guild else self.config), white_black_list)
         blacklist = await config()
         if blacklist:
+            self._set_cache(white_black_list, guild, blacklist)
             return blacklist
 
         # We don't have anyone in the block/allowlist currently
         # Let's check if the bot has anybody in the block/allowlist
         bot_blacklist = await getattr(self.bot, f"get_{white_black_list}")(guild)
         if not bot_blacklist:
+            self._cache.mark_empty(white_black_list, guild)
             return {}
         blacklist = {str(i): "No reason provided." for i in bot_blacklist}
         await config.set(blacklist)
-        if white_black_list == "whitelist":
-            self._cache.update_whitelist(guild, blacklist)
-        else:
-            self._cache.update_blacklist(guild, blacklist)
+        self._set_cache(white_black_list, guild, blacklist)
         return blacklist
 
     async def edit_reason(
@@ -367,15 +560,32 @@ class AdvancedBlacklist(commands.Cog):
         reason: str,
         guild: Optional[discord.Guild] = None,
     ) -> None:
-        config = getattr((self.config.guild(guild) if guild else self.config), white_black_list)
-        async with config() as blacklist:
-            actual = str(getattr(user_or_role, "id", user_or_role))
-            blacklist[actual] = reason
-            if white_black_list == "whitelist":
-                self._cache.update_whitelist(guild, blacklist)
-            else:
-                self._cache.update_blacklist(guild, blacklist)
-        del blacklist, actual
+        actual = str(getattr(user_or_role, "id", user_or_role))
+        current = self._cache_list(white_black_list, guild)
+        self._record("edit", white_black_list, guild, ((actual, current.get(actual), reason),))
+        self._set_cache(white_black_list, guild, {**current, actual: reason})
+        self._writer.set_reasons(white_black_list, guild, {actual: reason})
+
+    def _record(
+        self,
+        action: str,
+        white_black_list: _WhiteBlacklist,
+        guild: Optional[Union[discord.Guild, int]],
+        changes: Iterable[Tuple[str, Optional[str], Optional[str]]],
+    ) -> None:
+        """Add `(id, previous reason, new reason)` changes to the audit log"""
+        actor = _actor.get()
+        guild_id = getattr(guild, "id", guild)
+        for entry_id, previous, reason in changes:
+            self._audit.record(
+                action,
+                white_black_list,
+                guild_id,
+                entry_id,
+                actor=actor,
+                previous=previous,
+                reason=reason,
+            )
 
     async def in_list(
         self,
@@ -384,9 +594,13 @@ class AdvancedBlacklist(commands.Cog):
         white_black_list: _WhiteBlacklist,
         guild: Optional[discord.Guild] = None,
     ) -> bool:
-        actual = getattr(user_or_role, "id", user_or_role)
-        data = await self.get_list(white_black_list=white_black_list, guild=guild)
-        return actual in data or str(actual) in data
+        """|coro|
+
+        Check if a user or role is in the block/allowlist
+
+        This only checks the cache, which is filled when the cog loads
+        """
+        return getattr(self._cache, f"in_{white_black_list}")(guild, user_or_role)
 
     @commands.command(name="advancedblacklistversion", aliases=["advblversion"], hidden=True)
     async def advbl_version(self, ctx: commands.Context) -> None:
@@ -425,7 +639,9 @@ class AdvancedBlacklist(commands.Cog):
         data = await get_source(
             ctx, await ctx.embed_requested(), "AdvancedBlacklist Format", settings=current
         )
-        await FormatView(self.bot, data, "Change the format", self.config, current).start(ctx)
+        await FormatView(
+            self.bot, data, "Change the format", self.config, current, on_update=self._set_format
+        ).start(ctx)
 
     @blocklist.command(name="add")
     async def blocklist_add(
@@ -462,6 +678,45 @@ class AdvancedBlacklist(commands.Cog):
             )
         )
 
+    @blocklist.command(name="tempadd")
+    async def blocklist_tempadd(
+        self,
+        ctx: commands.Context,
+        duration: commands.TimedeltaConverter(
+            minimum=timedelta(minutes=1), default_unit="minutes"
+        ),
+        users_roles: GreedyUserOrRole,
+        *,
+        reason: Optional[str] = None,
+    ) -> None:
+        r"""Add a user or role to the blocklist for a while
+
+        **Arguments:**
+            \- `duration`              How long they should stay on the blocklist, e.g. `1d12h`
+            \- `users_roles`           The users/roles to add to the blocklist
+            \- `reason`                Optional reason, defaults to "No reason provided."
+        """
+        worked, users_or_roles = await _filter_bots(ctx, users_roles, "blacklist")
+        if not worked:
+            return
+
+        if not reason:
+            reason = "No reason provided."
+
+        expires_at = datetime.now(timezone.utc) + duration
+        await self.add_to_list(
+            users_or_roles, white_black_list="blacklist", reason=reason, expires_at=expires_at
+        )
+        await ctx.send(
+            (
+                "I have added {plural} to the blocklist until {time} with the reason: `{reason}`"
+            ).format(
+                plural="those users/roles" if len(users_or_roles) > 1 else "that user/role",
+                time=discord.utils.format_dt(expires_at),
+                reason=reason,
+            )
+        )
+
     @blocklist.command(name="remove", aliases=["del", "delete"])
     async def blocklist_remove(self, ctx: commands.Context, users_roles: GreedyUserOrRole) -> None:
         r"""Remove users/roles from the blocklist
@@ -498,6 +753,35 @@ class AdvancedBlacklist(commands.Cog):
         await self.edit_reason(user_or_role, white_black_list="blacklist", reason=reason)
         await ctx.send("Edited the reason for that user")
 
+    @blocklist.command(name="history")
+    async def blocklist_history(self, ctx: commands.Context, user_or_role: UserOrRole) -> None:
+        r"""View every change made to a user or role's allow/blocklist entries
+
+        **Arguments:**
+            \- `user_or_role`          The user/role to view the history of
+        """
+        entry_id = str(getattr(user_or_role, "id", user_or_role))
+        entries = await self._audit.history(entry_id)
+        if not entries:
+            await ctx.send("I don't have any history for that user/role")
+            return
+
+        lines = []
+        for entry in entries:
+            list_name = "allowlist" if entry["list"] == "whitelist" else "blocklist"
+            scope = f"local {list_name} ({entry['scope']})" if entry["scope"] else list_name
+            actor = f"<@{entry['actor']}>" if entry["actor"] else "core Red or expiry"
+            line = f"<t:{int(entry['ts'])}:f> **{entry['action']}** {scope} by {actor}"
+            if entry["reason"] is not None:
+                line += f"\n\t Reason: {entry['reason']}"
+            if entry["previous"] is not None:
+                line += f"\n\t Previously: {entry['previous']}"
+            lines.append(line)
+        pages = list(pagify("\n".join(lines), page_length=1500))
+        name = getattr(user_or_role, "name", entry_id)
+        footer = f"Showing the latest {len(entries)} changes"
+        await Menu.start(Page(ctx, pages, title=f"History for {name}", footer=footer), ctx)
+
     @blocklist.command(name="list")
     async def blocklist_list(self, ctx: commands.Context) -> None:
         r"""List the users/roles in the bot's blocklist"""
@@ -508,6 +792,86 @@ class AdvancedBlacklist(commands.Cog):
         """Clears the blocklist"""
         await self._handle_clearing(ctx, confirm, "blacklist", None)
 
+    @blocklist.command(name="export")
+    @commands.bot_has_permissions(attach_files=True)
+    async def blocklist_export(self, ctx: commands.Context, fmt: FileFormat = "jsonl") -> None:
+        r"""Export the global and local blocklists to a file
+
+        Each entry is saved with its id, reason, and scope (`global` or the server's id)
+
+        **Arguments:**
+            \- `fmt`                   The file format, `jsonl` or `csv`. Defaults to `jsonl`
+        """
+        # NOTE the cached lists are updated in place, so they're copied for the thread
+        lists = [(gid, dict(data)) for gid, data in self._cache.iter_lists("blacklist")]
+        with tempfile.TemporaryFile() as raw:
+            fp = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            amount = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(write_records, fp, lists, fmt)
+            )
+            fp.flush()
+            fp.detach()
+            if not amount:
+                await ctx.send("There are no users/roles on the blocklist")
+                return
+            raw.seek(0)
+            await ctx.send(
+                f"Here is the blocklist ({amount} entries)",
+                file=discord.File(raw, filename=f"blocklist.{fmt}"),
+            )
+
+    @blocklist.command(name="import")
+    async def blocklist_import(self, ctx: commands.Context) -> None:
+        r"""Import users/roles into the blocklist from an attached file
+
+        The file can be a `.jsonl` or `.csv` file, see `[p]blocklist export` for the format.
+        Entries with a server id as their scope are added to that server's local blocklist
+        """
+        if not ctx.message.attachments:
+            await ctx.send("Please attach a `.jsonl` or `.csv` file to import")
+            return
+        attachment = ctx.message.attachments[0]
+        fmt = file_format(attachment.filename)
+        if fmt is None:
+            await ctx.send("The file must be a `.jsonl` or `.csv` file")
+            return
+
+        result = ParseResult()
+        added = 0
+        owners = self.bot.owner_ids or set()
+        start = time.perf_counter()
+        async with ctx.typing(), self._writer.hold():
+            try:
+                lines = iter_attachment_lines(attachment)
+                async for chunk in parse_records(lines, fmt, result):
+                    scoped: Dict[Optional[int], Dict[str, str]] = {}
+                    for record in chunk:
+                        if record.id in owners:
+                            result.skipped += 1
+                            continue
+                        scoped.setdefault(record.scope, {})[str(record.id)] = record.reason
+                    for scope, entries in scoped.items():
+                        guild = None
+                        if scope is not None:
+                            guild = self.bot.get_guild(scope) or discord.Object(scope)
+                        await self._add_entries(
+                            entries, white_black_list="blacklist", guild=guild  # type:ignore
+                        )
+                        # NOTE imported entries are permanent, like the ones in the file
+                        self._update_expiries("blacklist", guild, entries)
+                        added += len(entries)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                log.error("Failed to read the blocklist import file", exc_info=e)
+                await ctx.send(
+                    f"I couldn't read the rest of that file. I imported {added} of the "
+                    f"{result.parsed} entries I read before running into an error"
+                )
+                return
+        await ctx.send(
+            f"Imported {added} of {result.parsed} entries into the blocklist and skipped "
+            f"{result.skipped} invalid entries in {time.perf_counter() - start:.2f}s"
+        )
+
     @commands.group(name="allowlist", aliases=["whitelist"])
     @commands.is_owner()
     async def allowlist(self, ctx: commands.Context) -> None:
@@ -660,6 +1024,53 @@ class AdvancedBlacklist(commands.Cog):
             return
         await ctx.send("Added that user/role to the local blocklist")
 
+    @local_blocklist.command(name="tempadd")
+    async def local_blocklist_tempadd(
+        self,
+        ctx: commands.Context,
+        duration: commands.TimedeltaConverter(
+            minimum=timedelta(minutes=1), default_unit="minutes"
+        ),
+        users_or_roles: GreedyUserOrRole,
+        *,
+        reason: Optional[str] = None,
+    ) -> None:
+        r"""Add users or roles to the local blocklist for a while
+
+        **Arguments:**
+            \- `duration`              How long they should stay on the blocklist, e.g. `1d12h`
+            \- `users_or_roles`        The users/roles to add to the local blocklist
+            \- `reason`                The reason you added the users/roles
+        """
+        if TYPE_CHECKING:
+            assert ctx.guild is not None
+            assert isinstance(ctx.author, discord.Member)
+        worked, users_or_roles = await _filter_bots(ctx, users_or_roles, "blacklist")
+        if not worked:
+            return
+
+        if ctx.author in users_or_roles or ctx.author.id in users_or_roles:
+            await ctx.send("You cannot add yourself to the local blocklist!")
+            return
+
+        if not reason:
+            reason = "No reason provided."
+
+        expires_at = datetime.now(timezone.utc) + duration
+        await self.add_to_list(
+            users_or_roles,
+            white_black_list="blacklist",
+            reason=reason,
+            guild=ctx.guild,
+            expires_at=expires_at,
+        )
+        await ctx.send(
+            "Added {plural} to the local blocklist until {time}".format(
+                plural="those users/roles" if len(users_or_roles) > 1 else "that user/role",
+                time=discord.utils.format_dt(expires_at),
+            )
+        )
+
     @local_blocklist.command(name="edit")
     async def local_blocklist_edit(
         self, ctx: commands.Context, user_or_role: UserOrRole, *, reason: str
@@ -739,7 +1150,7 @@ class AdvancedBlacklist(commands.Cog):
             return
 
         author_check = _check_author(
-            ctx.guild, ctx.author, users_or_roles, await self.bot.get_whitelist()
+            ctx.guild, ctx.author, users_or_roles, self._cache.whitelist_index(ctx.guild)
         )
 
         if author_check is False:
@@ -777,7 +1188,11 @@ class AdvancedBlacklist(commands.Cog):
             return
 
         check_author = _check_author(
-            ctx.guild, ctx.author, users_or_roles, await self.bot.get_whitelist(ctx.guild)
+            ctx.guild,
+            ctx.author,
+            users_or_roles,
+            self._cache.whitelist_index(ctx.guild),
+            removing=True,
         )
 
         if check_author is False:
@@ -835,7 +1250,7 @@ class AdvancedBlacklist(commands.Cog):
     ) -> None:
         allow_deny = "allowlist" if white_black_list == "whitelist" else "blocklist"
         local = "local " if guild else ""
-        list_format: Dict[str, str] = await self.config.format()
+        list_format = self._format
         format_settings: Dict[str, str] = {
             "{reason}": "",
             "{bot_name}": ctx.me.name,
@@ -845,24 +1260,27 @@ class AdvancedBlacklist(commands.Cog):
             "{allow_deny_list}": f"{local.capitalize()}{allow_deny.capitalize()}",
             "{index}": "0",
         }
-        title = _format_str(list_format["title"], format_settings)
-        footer = _format_str(list_format["footer"], format_settings)
+        title = list_format["title"].render(format_settings)
+        footer = list_format["footer"].render(format_settings)
         user_or_role = list_format["user_or_role"]
-        show: List[str] = []
 
         blocklist = await self.get_list(white_black_list=white_black_list, guild=guild)
         if not blocklist:
             await ctx.send(f"There are no users/roles on the {local}{allow_deny}")
             return
-        for index, (item, reason) in enumerate(blocklist.items(), 1):
-            maybe_user = getattr(self.bot.get_user(int(item)), "name", None)
+
+        def format_entry(index: int, item: str, reason: str) -> str:
+            item_id = int(item)
+            maybe_user = None
+            if guild is not None:
+                # NOTE only local lists can have roles, and a role is never fetched as a user
+                maybe_user = getattr(guild.get_role(item_id), "name", None)
             if maybe_user is None:
-                if ctx.guild:
-                    maybe_user = getattr(ctx.guild.get_role(int(item)), "name", item)
-                else:
-                    maybe_user = item
-            if TYPE_CHECKING:
-                assert maybe_user is not None
+                maybe_user = getattr(self.bot.get_user(item_id), "name", None)
+            if maybe_user is None:
+                # NOTE unknown users get fetched in the background, so the next page
+                # (or the next time the list is sent) will have their name
+                maybe_user = self._names.get(item_id) or item
             format_settings.update(
                 {
                     "{user_or_role}": maybe_user,
@@ -871,11 +1289,9 @@ class AdvancedBlacklist(commands.Cog):
                     "{ur_id}": str(item),
                 },
             )
-            show.append(_format_str(user_or_role, format_settings))
-        del maybe_user, item, reason
+            return user_or_role.render(format_settings)
 
-        show = _format_pages(show)
-        page = Page(ctx, show, title=title, footer=footer)
+        page = LazyPage(ctx, blocklist, format_entry, title=title, footer=footer)
         await Menu.start(page, ctx)
 
     async def _handle_confirm(self, ctx: commands.Context, allow_deny: str) -> bool:
@@ -890,75 +1306,40 @@ class AdvancedBlacklist(commands.Cog):
             await ctx.send("Sorry, that timed out!")
         return False
 
-    @commands.Cog.listener()
-    async def on_add_to_blacklist(
-        self, users: UsersOrRoles, guild: Optional[discord.Guild], adv_bl: bool = False
-    ) -> None:
-        if adv_bl:
-            # Explanation:
-            # NOTE this should only be true if this is being
-            # ran from `[p]blocklist add <user>` so we won't
-            # need to set a reason here
-            return
-            # TODO(Amy) make ErrorBlacklist use this feature as well
-            # NOTE I forgor what I wanted to make error blacklist do???
-
-        reason = "No reason provided."
-        await self.add_to_list(
-            users, white_black_list="blacklist", reason=reason, guild=guild, override=True
-        )
-
-    @commands.Cog.listener()
-    async def on_remove_from_blacklist(
-        self, users: UsersOrRoles, guild: Optional[discord.Guild], adv_bl: bool = False
-    ) -> None:
-        if adv_bl:
-            # NOTE see above `Explanation`
-            return
-
-        await self.remove_from_list(
-            users, white_black_list="blacklist", guild=guild, override=True
-        )
-
-    @commands.Cog.listener()
-    async def on_blacklist_clear(
-        self, guild: Optional[discord.Guild], adv_bl: bool = False
-    ) -> None:
-        if adv_bl:
-            return
-        await self.clear_list(white_black_list="blacklist", guild=guild, override=True)
-
-    @commands.Cog.listener()
-    async def on_add_to_whitelist(
-        self, users: UsersOrRoles, guild: Optional[discord.Guild], adv_bl: bool = False
-    ) -> None:
-        if adv_bl:
-            return
-
-        reason = "No reason provided."
-        await self.add_to_list(
-            users, white_black_list="whitelist", reason=reason, guild=guild, override=True
-        )
-
-    @commands.Cog.listener()
-    async def on_remove_from_whitelist(
-        self, users: UsersOrRoles, guild: Optional[discord.Guild], adv_bl: bool = False
-    ) -> None:
-        if adv_bl:
-            return
-
-        await self.remove_from_list(
-            users, white_black_list="whitelist", guild=guild, override=True
-        )
-
-    @commands.Cog.listener()
-    async def on_whitelist_clear(
-        self, guild: Optional[discord.Guild], adv_bl: bool = False
-    ) -> None:
-        if adv_bl:
-            return
-
-        await self.clear_list(white_black_list="whitelist", guild=guild, override=True)
+    async def _on_blocklist_events(self, events: List[BlocklistEvent]) -> None:
+        # Explanation:
+        # NOTE `adv_bl` should only be true if this is being
+        # ran from `[p]blocklist add <user>` and the like so the list is already
+        # up to date. Everything else came from core Red and needs to be mirrored here
+        # TODO(Amy) make ErrorBlacklist use this feature as well
+        grouped = itertools.groupby(events, key=lambda e: (e.method, e.guild))
+        for (method, guild), group in grouped:
+            action, white_black_list = method.rsplit("_", 1)
+            if TYPE_CHECKING:
+                assert white_black_list in ("whitelist", "blacklist")
+            external = [e for e in group if not e.adv_bl]
+            if action == "add_to":
+                self._cache.invalidate(white_black_list, guild)
+            if not external:
+                continue
+            if action == "clear":
+                await self.clear_list(
+                    white_black_list=white_black_list, guild=guild, override=True
+                )
+                continue
+            ids = {i for e in external for i in e.ids}
+            if action == "add_to":
+                await self.add_to_list(
+                    ids,
+                    white_black_list=white_black_list,
+                    reason="No reason provided.",
+                    guild=guild,
+                    override=True,
+                )
+            else:
+                await self.remove_from_list(
+                    ids, white_black_list=white_black_list, guild=guild, override=True
+                )
 
     @commands.Cog.listener()
     async def on_error_blacklist(
@@ -0,0 +1,108 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+__all__ = ("ExpiryKey", "ExpiryScheduler")
+
+_log = logging.getLogger("redbot.jojocogs.advancedblacklist.expiry")
+# NOTE (guild id or None for global, list type, user/role id)
+ExpiryKey = Tuple[Optional[int], str, str]
+
+
+class ExpiryScheduler:
+    """A single task that removes entries once their time is up
+
+    Deadlines are kept in a min-heap so the task only ever sleeps until the next one.
+    Cancelled or rescheduled entries are left in the heap and skipped when they come up,
+    and everything due within `window` seconds of each other is handed to `callback` at once
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[List[ExpiryKey]], Awaitable[None]],
+        *,
+        window: float = 1.0,
+    ):
+        self.callback = callback
+        self.window = window
+        self._heap: List[Tuple[float, int, ExpiryKey]] = []
+        self._deadlines: Dict[ExpiryKey, float] = {}
+        self._counter = itertools.count()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: ExpiryKey) -> bool:
+        return key in self._deadlines
+
+    def get(self, key: ExpiryKey) -> Optional[float]:
+        return self._deadlines.get(key)
+
+    def schedule(self, key: ExpiryKey, when: float) -> None:
+        """Schedule `key` to expire at the unix timestamp `when`"""
+        self._deadlines[key] = when
+        heapq.heappush(self._heap, (when, next(self._counter), key))
+        if self._heap[0][2] == key:
+            # NOTE this is the new earliest deadline, so the task needs to sleep less
+            self._wake.set()
+
+    def cancel(self, key: ExpiryKey) -> bool:
+        return self._deadlines.pop(key, None) is not None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _drop_stale(self) -> None:
+        while self._heap:
+            when, _, key = self._heap[0]
+            if self._deadlines.get(key) == when:
+                return
+            heapq.heappop(self._heap)
+
+    async def _sleep(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _run(self) -> None:
+        while True:
+            self._drop_stale()
+            if not self._heap:
+                await self._sleep(None)
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                await self._sleep(delay)
+                continue
+
+            cutoff = time.time() + self.window
+            due: List[ExpiryKey] = []
+            while self._heap and self._heap[0][0] <= cutoff:
+                when, _, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == when:
+                    del self._deadlines[key]
+                    due.append(key)
+            if not due:
+                continue
+            try:
+                await self.callback(due)
+            except Exception as e:
+                _log.error(f"Failed to remove {len(due)} expired entries", exc_info=e)
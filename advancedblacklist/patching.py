@@ -5,20 +5,39 @@
 # While I would love to add this, I'm not going to :)
 # So have this fun stuff
 
+# The wrappers are installed once per bot and shared between every cog that wants
+# to know about blocklist changes. Each cog gets a `Patch` which holds its subscriptions,
+# and the methods are only restored once the last `Patch` has been destroyed
+
+
+from __future__ import annotations
 
 import asyncio
+import inspect
 import logging
 from functools import wraps
-from typing import Any, Callable, Coroutine, Dict, Final, List
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Final,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
 
+import discord
 from discord.utils import maybe_coroutine
 from redbot.core.bot import Red
 
-__all__ = ("Patch",)
+__all__ = ("BlocklistEvent", "Patch", "Subscription")
 
 _log = logging.getLogger("redbot.jojocogs.advancedblacklist.patch")
 Coro = Callable[..., Coroutine[Any, Any, Any]]
-_lock = asyncio.Lock()
 _names: Final[List[str]] = [
     "add_to_blacklist",
     "remove_from_blacklist",
@@ -27,38 +46,137 @@ _names: Final[List[str]] = [
     "remove_from_whitelist",
     "clear_whitelist",
 ]
+# NOTE this lives on the bot so that reloading this module doesn't wrap the methods twice
+_registry_attr: Final[str] = "_jojocogs_blocklist_patch"
 
 
-def _with_lock(func: Callable[[Any], Any]) -> Coro:
-    @wraps(func)
-    async def inner(*args, **kwargs) -> Any:
-        async with _lock:
-            return await maybe_coroutine(func, *args, **kwargs)
+class BlocklistEvent(NamedTuple):
+    method: str
+    ids: Tuple[int, ...]
+    guild: Optional[discord.Guild]
+    adv_bl: bool
 
-    return inner
 
+class Subscription:
+    """A callback that gets told about blocklist changes
 
-class Patch:
+    If `batch` is true the callback gets a list of every event that happened
+    within `delay` seconds (or once `max_size` events have built up),
+    otherwise it gets called with each event
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Any], Any],
+        *,
+        events: Optional[FrozenSet[str]] = None,
+        batch: bool = False,
+        delay: float = 1.0,
+        max_size: int = 100,
+    ):
+        self.callback = callback
+        self.events = events
+        self.batch = batch
+        self.delay = delay
+        self.max_size = max_size
+        self._queue: List[BlocklistEvent] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._active = True
+
+    def _spawn(self, payload: Any) -> None:
+        task = asyncio.create_task(self._call(payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _push(self, event: BlocklistEvent) -> None:
+        if not self._active or (self.events is not None and event.method not in self.events):
+            return
+        if not self.batch:
+            self._spawn(event)
+            return
+        self._queue.append(event)
+        if len(self._queue) >= self.max_size:
+            self._fire()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.delay, self._fire)
+
+    def _fire(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        events, self._queue = self._queue, []
+        if events:
+            self._spawn(events)
+
+    async def _call(self, payload: Any) -> None:
+        try:
+            await maybe_coroutine(self.callback, payload)
+        except Exception as e:
+            _log.error(f"Error in blocklist subscriber {self.callback!r}", exc_info=e)
+
+    def cancel(self) -> None:
+        self._active = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._queue = []
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+
+    async def close(self) -> None:
+        """|coro|
+
+        Stop listening, but deliver the batch that's waiting and let running callbacks finish
+        """
+        self._active = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        events, self._queue = self._queue, []
+        if events:
+            await self._call(events)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.cancel()
+
+
+class _Registry:
     def __init__(self, bot: Red):
         self.bot = bot
+        self.users = 0
+        self.subscriptions: List[Subscription] = []
         self._funcs: Dict[str, Coro] = {}
-        self._initialized = False
 
-    def _patch_wrapper(self, method_name: str, func: Coro) -> Coro:
+    def _wrapper(self, method_name: str, func: Coro) -> Coro:
+        signature = inspect.signature(func)
+
         @wraps(func)
         async def inner(*args, **kwargs):
             adv_bl = kwargs.pop("adv_bl", False)
-            await func(*args, **kwargs)
-            self.bot.dispatch(f"on_{method_name}", *args, **kwargs, adv_bl=adv_bl)
+            bound = signature.bind(*args, **kwargs)
+            if (users := bound.arguments.get("users_or_roles")) is not None:
+                # NOTE this could be a generator, which the original method would exhaust
+                bound.arguments["users_or_roles"] = users = list(users)
+            await func(*bound.args, **bound.kwargs)
+            # NOTE `Bot.dispatch` adds the "on_" prefix itself
+            self.bot.dispatch(method_name, *bound.args, **bound.kwargs, adv_bl=adv_bl)
+
+            event = BlocklistEvent(
+                method_name,
+                tuple(getattr(u, "id", u) for u in users or ()),
+                bound.arguments.get("guild"),
+                adv_bl,
+            )
+            for sub in self.subscriptions:
+                sub._push(event)
 
         return inner
 
-    @_with_lock
-    def startup(self) -> None:
-        if self._initialized:
-            return
+    def install(self) -> None:
         for name in _names:
-            func = getattr(self.bot, name)
+            func = getattr(self.bot, name, None)
             if not func:
                 # Shouldn't really happen let's log just in case
                 _log.warning(
@@ -68,11 +186,38 @@ class Patch:
                 continue
 
             self._funcs[name] = func
-            setattr(self.bot, name, self._patch_wrapper(name, func))
+            setattr(self.bot, name, self._wrapper(name, func))
+
+    def uninstall(self) -> None:
+        for name, func in self._funcs.items():
+            setattr(self.bot, name, func)
+        self._funcs.clear()
+
+
+def _get_registry(bot: Red) -> _Registry:
+    registry = getattr(bot, _registry_attr, None)
+    if registry is None:
+        registry = _Registry(bot)
+        setattr(bot, _registry_attr, registry)
+    return registry
+
+
+class Patch:
+    def __init__(self, bot: Red):
+        self.bot = bot
+        self._subscriptions: List[Subscription] = []
+        self._initialized = False
+
+    async def startup(self) -> None:
+        if self._initialized:
+            return
+        registry = _get_registry(self.bot)
+        if not registry.users:
+            registry.install()
+        registry.users += 1
         self._initialized = True
 
-    @_with_lock
-    def destroy(self) -> None:
+    async def destroy(self) -> None:
         if not self._initialized:
             return
 
@@ -81,5 +226,43 @@ class Patch:
         # but just in case
         self._initialized = False
 
-        for name, func in self._funcs.items():
-            setattr(self.bot, name, func)
+        registry = _get_registry(self.bot)
+        for sub in self._subscriptions:
+            # NOTE changes made right before unloading still have to reach the subscriber
+            registry.subscriptions.remove(sub)
+            await sub.close()
+        self._subscriptions.clear()
+        registry.users -= 1
+        if not registry.users:
+            registry.uninstall()
+            delattr(self.bot, _registry_attr)
+
+    def subscribe(
+        self,
+        callback: Callable[[Any], Any],
+        *,
+        events: Optional[List[str]] = None,
+        batch: bool = False,
+        delay: float = 1.0,
+        max_size: int = 100,
+    ) -> Subscription:
+        """Subscribe to blocklist changes
+
+        Arguments
+        ------------
+        callback: called with a `BlocklistEvent`, or a list of them if `batch` is true
+        events: the methods to listen to, e.g. `["add_to_blacklist"]`. Defaults to all of them
+        batch: whether to group events together
+        delay: how long to wait for more events when batching
+        max_size: the most events one batch can hold
+        """
+        sub = Subscription(
+            callback,
+            events=frozenset(events) if events is not None else None,
+            batch=batch,
+            delay=delay,
+            max_size=max_size,
+        )
+        self._subscriptions.append(sub)
+        _get_registry(self.bot).subscriptions.append(sub)
+        return sub
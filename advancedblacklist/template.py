@@ -0,0 +1,53 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Final, List, Mapping, Tuple
+
+__all__ = ("placeholders", "Template", "compile_format")
+
+
+placeholders: Final[Tuple[str, ...]] = (
+    "{reason}",
+    "{bot_name}",
+    "{version_info}",
+    "{user_or_role}",
+    "{ur_id}",
+    "{allow_deny_list}",
+    "{index}",
+)
+_placeholder_re = re.compile("(" + "|".join(map(re.escape, placeholders)) + ")")
+
+
+class Template:
+    """A format string that has been split into literal text and placeholders
+
+    Rendering fills the placeholder slots and joins the parts,
+    so the string is only scanned once when it's compiled
+    """
+
+    __slots__ = ("source", "_parts", "_slots")
+
+    def __init__(self, source: str):
+        self.source = source
+        # NOTE `re.split` with a group alternates between literal text and placeholders
+        self._parts: List[str] = _placeholder_re.split(source)
+        self._slots: Tuple[Tuple[int, str], ...] = tuple(
+            (index, part) for index, part in enumerate(self._parts) if index % 2
+        )
+
+    def render(self, values: Mapping[str, str]) -> str:
+        parts = self._parts.copy()
+        for index, key in self._slots:
+            parts[index] = values[key]
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"<Template source={self.source!r}>"
+
+
+def compile_format(settings: Mapping[str, str]) -> Dict[str, Template]:
+    """Compile each of the title, user_or_role, and footer formats"""
+    return {key: Template(value) for key, value in settings.items()}
@@ -0,0 +1,160 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+# Streaming import/export for the allow/blocklists
+# Files are read line by line and handed out in chunks so that
+# a list with 100k entries never has to be in memory as a whole
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import IO, AsyncIterator, Iterable, List, Literal, NamedTuple, Optional, Tuple
+
+import aiohttp
+import discord
+
+__all__ = (
+    "FileFormat",
+    "Record",
+    "ParseResult",
+    "file_format",
+    "iter_attachment_lines",
+    "parse_records",
+    "write_records",
+)
+
+FileFormat = Literal["jsonl", "csv"]
+_csv_header = ("id", "reason", "scope")
+
+
+class Record(NamedTuple):
+    id: int
+    reason: str
+    scope: Optional[int]  # NOTE `None` is the global list
+
+
+class ParseResult:
+    __slots__ = ("parsed", "skipped")
+
+    def __init__(self):
+        self.parsed: int = 0
+        self.skipped: int = 0
+
+
+def file_format(filename: str) -> Optional[FileFormat]:
+    name = filename.lower()
+    if name.endswith((".jsonl", ".json", ".ndjson")):
+        return "jsonl"
+    elif name.endswith(".csv"):
+        return "csv"
+    return None
+
+
+async def iter_attachment_lines(attachment: discord.Attachment) -> AsyncIterator[str]:
+    """Stream the lines of an attachment without downloading the entire file first"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(attachment.url) as resp:
+            resp.raise_for_status()
+            first = True
+            async for line in resp.content:
+                decoded = line.decode("utf-8")
+                if first:
+                    decoded = decoded.lstrip("\ufeff")
+                    first = False
+                yield decoded
+
+
+def _to_record(raw_id: object, reason: object, scope: object) -> Record:
+    if scope in (None, "", "global"):
+        actual_scope = None
+    else:
+        actual_scope = int(str(scope))
+    return Record(int(str(raw_id)), str(reason or "No reason provided."), actual_scope)
+
+
+def _parse_jsonl(line: str) -> Optional[Record]:
+    if not line.strip():
+        return None
+    data = json.loads(line)
+    return _to_record(data["id"], data.get("reason"), data.get("scope"))
+
+
+def _parse_csv(text: str) -> List[Optional[Record]]:
+    ret: List[Optional[Record]] = []
+    for row in csv.reader(io.StringIO(text)):
+        if not row or tuple(row) == _csv_header:
+            continue
+        try:
+            ret.append(_to_record(*row[:3]) if len(row) >= 3 else _to_record(*row, None))
+        except (TypeError, ValueError):
+            ret.append(None)
+    return ret
+
+
+async def parse_records(
+    lines: AsyncIterator[str], fmt: FileFormat, result: ParseResult, *, chunk_size: int = 500
+) -> AsyncIterator[List[Record]]:
+    """Parse a stream of lines into chunks of records
+
+    Invalid lines get skipped and counted in `result`
+    """
+    chunk: List[Record] = []
+    pending_csv = ""
+    async for line in lines:
+        parsed: List[Optional[Record]]
+        if fmt == "jsonl":
+            try:
+                record = _parse_jsonl(line)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                result.skipped += 1
+                continue
+            if record is None:
+                continue
+            parsed = [record]
+        else:
+            # NOTE a quoted csv field can span lines, which is the case when the
+            # number of quotes read so far is odd
+            pending_csv += line
+            if pending_csv.count('"') % 2:
+                continue
+            parsed, pending_csv = _parse_csv(pending_csv), ""
+        for record in parsed:
+            if record is None:
+                result.skipped += 1
+                continue
+            chunk.append(record)
+        if len(chunk) >= chunk_size:
+            result.parsed += len(chunk)
+            yield chunk
+            chunk = []
+    if pending_csv:
+        for record in _parse_csv(pending_csv):
+            if record is None:
+                result.skipped += 1
+            else:
+                chunk.append(record)
+    if chunk:
+        result.parsed += len(chunk)
+        yield chunk
+
+
+def write_records(
+    fp: IO[str], lists: Iterable[Tuple[Optional[int], dict]], fmt: FileFormat
+) -> int:
+    """Write `(scope, {id: reason})` pairs to `fp`, returns the amount of records written"""
+    amount = 0
+    writer = csv.writer(fp) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(_csv_header)
+    for scope, data in lists:
+        str_scope = "global" if scope is None else str(scope)
+        for user_id, reason in data.items():
+            if writer is not None:
+                writer.writerow((user_id, reason, str_scope))
+            else:
+                fp.write(json.dumps({"id": int(user_id), "reason": reason, "scope": str_scope}))
+                fp.write("\n")
+            amount += 1
+    return amount
@@ -4,8 +4,21 @@
 from __future__ import annotations
 
 import datetime
+import itertools
+import math
 from contextlib import suppress
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import discord
 from discord.ui.button import button as button_dec
@@ -28,6 +41,7 @@ __all__ = (
     "get_source",
     "ConfirmView",
     "Page",
+    "LazyPage",
     "Menu",
     "FormatView",
 )
@@ -147,13 +161,121 @@ class Page:
             )
             embed.set_footer(text=self.footer)
             return {"embed": embed}
-        page = "\n".join(page)
         string = f"# {self.title}\n\n\t{page}\n-# {self.footer}"
         return {"content": string}
 
+    async def get_page(self, page_num: int) -> str:
+        return self.data[page_num]
+
     def __len__(self) -> int:
         return len(self.data)
 
+    def checked_page(self, page_num: int) -> int:
+        """Get the page to show for `page_num`, wrapping around either end"""
+        if self.max_len > page_num >= 0:
+            return page_num
+        elif self.max_len <= page_num:
+            return 0
+        return self.max_len - 1
+
+
+class LazyPage(Page):
+    """A page source that only formats the entries on the pages that get shown
+
+    `formatter` gets called with the 1-based index, the id, and the reason of an entry.
+    Pages are filled with entries until they'd go over `max_chars` (after the title and footer),
+    so how many pages there are is only an estimate until the last one has been built.
+    Rendered pages are kept so going back to a page doesn't format it again
+    """
+
+    def __init__(
+        self,
+        ctx: commands.Context,
+        entries: Mapping[str, str],
+        formatter: Callable[[int, str, str], str],
+        *,
+        title: str,
+        footer: str,
+        max_chars: int = 2000,
+    ):
+        super().__init__(ctx, [], title=title, footer=footer)
+        self.entries = entries
+        self.formatter = formatter
+        # NOTE what's left of a message once the title and footer are in, see `format_page`
+        overhead = len(f"# {title}\n\n\t\n-# {footer}")
+        self.max_chars = max(max_chars - overhead, 100)
+        self._pages: List[str] = []
+        self._next = 0
+        self.max_len = 1 if entries else 0
+        # NOTE one iterator for every page so building page n doesn't skip over n - 1 pages,
+        # `_held` is a line that was formatted but didn't fit on the page before
+        self._items: Iterator[Tuple[str, str]] = iter(entries.items())
+        self._pulled = 0
+        self._held: Optional[str] = None
+        self._done = not entries
+
+    def _next_line(self) -> Optional[str]:
+        if self._held is not None:
+            line, self._held = self._held, None
+            return line
+        try:
+            item, reason = next(self._items)
+        except StopIteration:
+            return None
+        except RuntimeError:
+            # NOTE the cached lists are updated in place, so if it changed size since
+            # the last page carry on from the same position in the changed list
+            self._items = itertools.islice(iter(self.entries.items()), self._pulled, None)
+            return self._next_line()
+        self._pulled += 1
+        line = self.formatter(self._pulled, item, reason)
+        if len(line) > self.max_chars:
+            line = f"{line[: self.max_chars - 3]}..."
+        return line
+
+    def _fill(self, page_num: Optional[int]) -> None:
+        """Build pages up to and including `page_num`, or every page if it's `None`"""
+        while not self._done and (page_num is None or len(self._pages) <= page_num):
+            lines: List[str] = []
+            size = 0
+            while (line := self._next_line()) is not None:
+                # NOTE +1 for the newline joining it to the line before
+                if lines and size + len(line) + 1 > self.max_chars:
+                    self._held = line
+                    break
+                lines.append(line)
+                size += len(line) + 1
+            else:
+                self._done = True
+            if lines:
+                self._next += len(lines)
+                self._pages.append("\n".join(lines))
+        total = len(self.entries)
+        if self._done or self._next >= total:
+            self.max_len = len(self._pages)
+        else:
+            # NOTE assume the pages left hold as many entries as the ones so far
+            per_page = self._next / len(self._pages)
+            self.max_len = len(self._pages) + math.ceil((total - self._next) / per_page)
+
+    async def get_page(self, page_num: int) -> str:
+        if page_num < 0:
+            raise IndexError(page_num)
+        self._fill(page_num)
+        return self._pages[page_num]
+
+    def checked_page(self, page_num: int) -> int:
+        if page_num >= 0:
+            self._fill(page_num)
+            return page_num if page_num < len(self._pages) else 0
+        # NOTE this is the only time every page gets built
+        self._fill(None)
+        return max(len(self._pages) - 1, 0)
+
+    def __len__(self) -> int:
+        self._fill(0)
+        return self.max_len
+
 
 class Menu(discord.ui.View):
     def __init__(self, source: Page, bot: Red, ctx: commands.Context):
@@ -177,25 +299,19 @@ class Menu(discord.ui.View):
     @classmethod
     async def start(cls, source: Page, ctx: commands.Context) -> None:
         self = cls(source, ctx.bot, ctx)
-        page = self.source.data[0]
+        page = await self.source.get_page(0)
         kwargs = await self.source.format_page(page)
         self.msg = await ctx.send(view=self, **kwargs)
 
     async def show_page(self, page_num: int) -> None:
-        page = self.source.data[page_num]
+        page = await self.source.get_page(page_num)
         self.current_page = page_num
         kwargs = await self.source.format_page(page)
         await self.msg.edit(view=self, **kwargs)
 
     async def show_checked_page(self, page_number: int) -> None:
-        max_len = self.source.max_len
         try:
-            if max_len > page_number >= 0:
-                await self.show_page(page_number)
-            elif max_len <= page_number:
-                await self.show_page(0)
-            else:
-                await self.show_page(max_len - 1)
+            await self.show_page(self.source.checked_page(page_number))
         except IndexError:
             pass
 
@@ -274,9 +390,12 @@ class FormatView(discord.ui.View):
         title: str,
         config: Config,
         settings: Dict[str, str],
+        *,
+        on_update: Optional[Callable[[Dict[str, str]], Any]] = None,
     ) -> None:
         super().__init__(timeout=60.0)
         self._bot = bot
+        self._on_update = on_update
         self.title = title
         self.config = config
         self.source = source
@@ -322,6 +441,8 @@ class FormatView(discord.ui.View):
 
     async def update(self, settings: Dict[str, str]) -> None:
         await self.config.format.set(settings)
+        if self._on_update is not None:
+            self._on_update(settings)
         self.source = await get_source(self.ctx, self.is_embed, self.title, settings)
         await self.start()
 
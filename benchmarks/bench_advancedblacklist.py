@@ -0,0 +1,342 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+"""Offline load test for the advancedblacklist cog
+
+This builds a stand-in for Red and a Config backed by an in-memory driver,
+fills the lists with `--users` users spread over `--guilds` guilds
+and times the hot paths of the cog.
+
+Run from the root of the repo (with Red installed) with
+``python -m benchmarks.bench_advancedblacklist --users 100000 --guilds 1000``
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import copy
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from redbot.core import Config, data_manager
+
+try:
+    from redbot.core._drivers.base import BaseDriver, IdentifierData
+except ImportError:  # Red < 3.5
+    from redbot.core.drivers.base import BaseDriver, IdentifierData  # type:ignore
+
+from advancedblacklist.core import AdvancedBlacklist
+
+
+class MemoryDriver(BaseDriver):
+    """A config driver that keeps everything in a dict"""
+
+    def __init__(self, cog_name: str, identifier: str, **kwargs):
+        super().__init__(cog_name, identifier)
+        self.data: Dict[str, Any] = {}
+
+    @classmethod
+    async def initialize(cls, **storage_details) -> None:
+        pass
+
+    @classmethod
+    async def teardown(cls) -> None:
+        pass
+
+    @staticmethod
+    def get_config_details() -> Dict[str, Any]:
+        return {}
+
+    async def get(self, identifier_data: IdentifierData) -> Any:
+        partial: Any = self.data
+        for key in identifier_data.to_tuple():
+            partial = partial[key]
+        return copy.deepcopy(partial)
+
+    async def set(self, identifier_data: IdentifierData, value: Any = None) -> None:
+        partial = self.data
+        keys = identifier_data.to_tuple()
+        for key in keys[:-1]:
+            partial = partial.setdefault(key, {})
+        partial[keys[-1]] = copy.deepcopy(value)
+
+    async def clear(self, identifier_data: IdentifierData) -> None:
+        partial = self.data
+        keys = identifier_data.to_tuple()
+        try:
+            for key in keys[:-1]:
+                partial = partial[key]
+            del partial[keys[-1]]
+        except KeyError:
+            pass
+
+    @classmethod
+    async def aiter_cogs(cls):
+        return
+        yield
+
+
+@contextlib.contextmanager
+def memory_config() -> Iterator[None]:
+    """Make `Config.get_conf` hand out configs that share in-memory drivers"""
+    original = Config.get_conf
+    drivers: Dict[Tuple[str, str], MemoryDriver] = {}
+
+    def get_conf(cls, cog_instance, identifier: int, force_registration: bool = False, **kwargs):
+        cog_name = type(cog_instance).__name__
+        key = (cog_name, str(identifier))
+        if key not in drivers:
+            drivers[key] = MemoryDriver(*key)
+        return cls(
+            cog_name=cog_name,
+            unique_identifier=str(identifier),
+            driver=drivers[key],
+            force_registration=force_registration,
+        )
+
+    Config.get_conf = classmethod(get_conf)  # type:ignore
+    try:
+        yield
+    finally:
+        Config.get_conf = original  # type:ignore
+
+
+@contextlib.contextmanager
+def temp_data_path() -> Iterator[None]:
+    """Point `cog_data_path` at a temporary directory, the audit log is written there"""
+    original = data_manager.basic_config
+    with tempfile.TemporaryDirectory() as path:
+        data_manager.basic_config = {"DATA_PATH": path, "COG_PATH_APPEND": "cogs"}
+        try:
+            yield
+        finally:
+            data_manager.basic_config = original
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.owner_id = 1
+        self.name = f"Guild {guild_id}"
+
+    def get_role(self, role_id: int) -> None:
+        return None
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = f"user{user_id}"
+
+
+class FakeMessage:
+    async def edit(self, **kwargs) -> None:
+        pass
+
+    async def delete(self) -> None:
+        pass
+
+
+class FakeContext:
+    def __init__(self, bot: FakeRed, guild: Optional[FakeGuild]):
+        self.bot = bot
+        self.guild = guild
+        self.me = FakeUser(0)
+        self.author = FakeUser(1)
+
+    async def send(self, *args, **kwargs) -> FakeMessage:
+        return FakeMessage()
+
+    async def embed_requested(self) -> bool:
+        return False
+
+    async def embed_colour(self) -> int:
+        return 0
+
+
+class FakeRed:
+    """Just enough of Red for advancedblacklist"""
+
+    def __init__(self, guilds: List[FakeGuild]):
+        self.guilds = guilds
+        self._guilds = {g.id: g for g in guilds}
+        self.owner_ids: Set[int] = {1}
+        self._lists: Dict[str, Dict[Optional[int], Set[int]]] = {
+            "blacklist": {},
+            "whitelist": {},
+        }
+
+    def _list(self, list_type: str, guild: Optional[FakeGuild]) -> Set[int]:
+        return self._lists[list_type].setdefault(getattr(guild, "id", None), set())
+
+    async def add_to_blacklist(self, users_or_roles, *, guild=None) -> None:
+        self._list("blacklist", guild).update(getattr(u, "id", u) for u in users_or_roles)
+
+    async def remove_from_blacklist(self, users_or_roles, *, guild=None) -> None:
+        self._list("blacklist", guild).difference_update(
+            getattr(u, "id", u) for u in users_or_roles
+        )
+
+    async def clear_blacklist(self, guild=None) -> None:
+        self._list("blacklist", guild).clear()
+
+    async def get_blacklist(self, guild=None) -> Set[int]:
+        return set(self._list("blacklist", guild))
+
+    async def add_to_whitelist(self, users_or_roles, *, guild=None) -> None:
+        self._list("whitelist", guild).update(getattr(u, "id", u) for u in users_or_roles)
+
+    async def remove_from_whitelist(self, users_or_roles, *, guild=None) -> None:
+        self._list("whitelist", guild).difference_update(
+            getattr(u, "id", u) for u in users_or_roles
+        )
+
+    async def clear_whitelist(self, guild=None) -> None:
+        self._list("whitelist", guild).clear()
+
+    async def get_whitelist(self, guild=None) -> Set[int]:
+        return set(self._list("whitelist", guild))
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self._guilds.get(guild_id)
+
+    def get_user(self, user_id: int) -> Optional[FakeUser]:
+        return FakeUser(user_id) if user_id % 2 else None
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        return FakeUser(user_id)
+
+    def remove_command(self, name: str) -> None:
+        return None
+
+    def add_command(self, command: Any) -> None:
+        pass
+
+    def dispatch(self, event: str, *args, **kwargs) -> None:
+        pass
+
+    async def wait_until_red_ready(self) -> None:
+        pass
+
+
+class Timings:
+    def __init__(self):
+        self.results: Dict[str, List[float]] = {}
+
+    async def time(self, name: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        ret = await func()
+        self.results.setdefault(name, []).append(time.perf_counter() - start)
+        return ret
+
+    def report(self) -> None:
+        print(f"{'operation':<32}{'calls':>8}{'p50':>12}{'p95':>12}{'p99':>12}{'max':>12}")
+        for name, samples in self.results.items():
+            samples.sort()
+            if len(samples) > 1:
+                q = statistics.quantiles(samples, n=100, method="inclusive")
+                p50, p95, p99 = q[49], q[94], q[98]
+            else:
+                p50 = p95 = p99 = samples[0]
+            print(
+                f"{name:<32}{len(samples):>8}"
+                + "".join(f"{v * 1e6:>10.1f}us" for v in (p50, p95, p99, samples[-1]))
+            )
+
+
+async def fill(cog: AdvancedBlacklist, guilds: List[FakeGuild], users: int) -> List[int]:
+    ids = [100_000_000_000_000_000 + i for i in range(users)]
+    per_guild = max(users // max(len(guilds), 1), 1)
+    # NOTE core Red has to have the same lists, otherwise the warm-up removes everyone
+    await cog.config.blacklist.set({str(i): "Global reason" for i in ids[: users // 10]})
+    await cog.bot.add_to_blacklist(ids[: users // 10])
+    for index, guild in enumerate(guilds):
+        chunk = ids[index * per_guild : (index + 1) * per_guild]
+        if chunk:
+            await cog.config.guild(guild).blacklist.set({str(i): "Local reason" for i in chunk})
+            await cog.bot.add_to_blacklist(chunk, guild=guild)
+    return ids
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    guilds = [FakeGuild(200_000_000_000_000_000 + i) for i in range(args.guilds)]
+    bot = FakeRed(guilds)
+    timings = Timings()
+
+    with memory_config(), temp_data_path():
+        # NOTE fill config first so that warming up the cache is part of what's measured
+        seed_cog = AdvancedBlacklist(bot)  # type:ignore
+        ids = await fill(seed_cog, guilds, args.users)
+        tracemalloc.start()
+        cog = await timings.time(
+            "async_init (warm-up)",
+            lambda: AdvancedBlacklist.async_init(bot),  # type:ignore
+        )
+        if cog._warmup_task is not None:
+            await timings.time("reconcile with Red", lambda: cog._warmup_task)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        for _ in range(args.iterations):
+            guild = rng.choice(guilds)
+            user = rng.choice(ids)
+            await timings.time(
+                "in_list",
+                lambda: cog.in_list(user, white_black_list="blacklist", guild=guild),
+            )
+            await timings.time(
+                "get_list", lambda: cog.get_list(white_black_list="blacklist", guild=guild)
+            )
+
+        for _ in range(min(args.iterations, 50)):
+            ctx = FakeContext(bot, rng.choice(guilds))
+            await timings.time(
+                "send_list (first page)",
+                lambda: cog.send_list(ctx, white_black_list="blacklist", guild=None),
+            )
+
+        for batch in range(args.bulk_batches):
+            guild = rng.choice(guilds)
+            users = ids[batch * args.bulk_size : (batch + 1) * args.bulk_size]
+            await timings.time(
+                f"add_to_list ({args.bulk_size} users)",
+                lambda: cog.add_to_list(
+                    users, white_black_list="blacklist", reason="Bulk", guild=guild
+                ),
+            )
+        await timings.time("flush write buffer", cog._writer.flush)
+
+        for _ in range(min(args.iterations, 20)):
+            user = rng.choice(ids)
+            await timings.time(
+                "red_delete_data_for_user",
+                lambda: cog.red_delete_data_for_user(requester="owner", user_id=user),
+            )
+
+        await cog.cog_unload()
+
+    print(f"{args.users} users over {args.guilds} guilds")
+    timings.report()
+    print(f"Memory after warm-up: {current / 1024 ** 2:.2f}MiB (peak {peak / 1024 ** 2:.2f}MiB)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--guilds", type=int, default=1_000)
+    parser.add_argument("--iterations", type=int, default=1_000)
+    parser.add_argument("--bulk-size", type=int, default=200)
+    parser.add_argument("--bulk-batches", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
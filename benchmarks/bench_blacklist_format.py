@@ -0,0 +1,60 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+"""Compare the compiled advancedblacklist format templates with the old `str.replace` loop
+
+Run from the root of the repo with ``python -m benchmarks.bench_blacklist_format``
+"""
+
+import argparse
+import timeit
+from typing import Dict, List
+
+from advancedblacklist.constants import default_format
+from advancedblacklist.template import compile_format
+
+
+def _format_str(string: str, replace: Dict[str, str]) -> str:
+    # NOTE this is the implementation `send_list` used before templates were compiled
+    for key, value in replace.items():
+        string = string.replace(key, value)
+    return string
+
+
+def _settings(index: int) -> Dict[str, str]:
+    return {
+        "{reason}": f"Reason number {index}",
+        "{bot_name}": "Red",
+        "{version_info}": "3.0.0",
+        "{user_or_role}": f"user{index}",
+        "{ur_id}": str(100000000000000000 + index),
+        "{allow_deny_list}": "Blocklist",
+        "{index}": str(index),
+    }
+
+
+def replace_loop(entries: List[Dict[str, str]]) -> List[str]:
+    fmt = default_format["user_or_role"]
+    return [_format_str(fmt, settings) for settings in entries]
+
+
+def compiled(entries: List[Dict[str, str]]) -> List[str]:
+    template = compile_format(default_format)["user_or_role"]
+    return [template.render(settings) for settings in entries]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    entries = [_settings(i) for i in range(args.entries)]
+    assert replace_loop(entries) == compiled(entries), "The outputs don't match!"
+    for func in (replace_loop, compiled):
+        best = min(timeit.repeat(lambda: func(entries), number=1, repeat=args.repeat))
+        print(f"{func.__name__:>12}: {best * 1000:8.2f}ms for {args.entries} entries")
+
+
+if __name__ == "__main__":
+    main()
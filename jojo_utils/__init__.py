@@ -0,0 +1,8 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+# Code shared between the cogs in this repo
+# Downloader installs this as `cog_shared.jojo_utils`, the cogs import it from there
+# and fall back to `jojo_utils` when they're ran from a clone of the repo.
+# NOTE nothing is imported here, regex workers import `_worker` through this package
+# and shouldn't have to import discord or Red to do so
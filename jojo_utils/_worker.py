@@ -0,0 +1,30 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+# The functions that run in the regex sandbox's worker processes
+# With the spawn start method (Windows and macOS) every worker imports this module,
+# so it can't import anything from a cog or from Red
+
+from __future__ import annotations
+
+import functools
+from typing import Any, List
+
+try:
+    import regex as re
+except ImportError:
+    import re  # type:ignore
+
+__all__ = ("search_many",)
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(pattern: str) -> Any:
+    # NOTE each worker process has its own cache
+    return re.compile(pattern)
+
+
+def search_many(pattern: str, items: List[str]) -> List[int]:
+    """Returns the indexes of the items the pattern matches"""
+    compiled = _compile(pattern)
+    return [index for index, item in enumerate(items) if compiled.search(item)]
@@ -0,0 +1,153 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+# Resolves user ids to names for lists where most people aren't in the bot's cache
+# A single resolver is kept on the bot and shared between every cog that acquires it,
+# so a user fetched for one cog's list doesn't have to be fetched again for another's
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Final, Iterable, List, Optional, Tuple
+
+import discord
+
+if TYPE_CHECKING:
+    from redbot.core.bot import Red
+
+__all__ = ("NameResolver",)
+
+_log = logging.getLogger("red.jojocogs.jojo_utils.names")
+# NOTE this lives on the bot so that other cogs can use the same cache
+_resolver_attr: Final[str] = "_jojocogs_name_resolver"
+
+
+class NameResolver:
+    """An LRU cache of user names with a time to live
+
+    Ids which aren't cached are fetched in the background, `batch_size` at a time
+    with at most `concurrency` requests running at once.
+    Deleted users are cached as `None` so they don't get fetched on every list
+    """
+
+    def __init__(
+        self,
+        bot: Red,
+        *,
+        max_size: int = 10_000,
+        ttl: float = 3600.0,
+        concurrency: int = 5,
+        batch_size: int = 50,
+    ):
+        self.bot = bot
+        self.max_size = max_size
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.users = 0
+        self._cache: OrderedDict[int, Tuple[float, Optional[str]]] = OrderedDict()
+        self._pending: Dict[int, None] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def acquire(cls, bot: Red) -> NameResolver:
+        """Get the resolver for this bot, creating it if needed. Call `release` on unload"""
+        resolver = getattr(bot, _resolver_attr, None)
+        if resolver is None:
+            resolver = cls(bot)
+            setattr(bot, _resolver_attr, resolver)
+        resolver.users += 1
+        return resolver
+
+    def release(self) -> None:
+        self.users -= 1
+        if self.users > 0:
+            return
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if getattr(self.bot, _resolver_attr, None) is self:
+            delattr(self.bot, _resolver_attr)
+
+    def _lookup(self, user_id: int) -> Tuple[bool, Optional[str]]:
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return False, None
+        expires, name = entry
+        if expires < time.monotonic():
+            del self._cache[user_id]
+            return False, None
+        self._cache.move_to_end(user_id)
+        return True, name
+
+    def _store(self, user_id: int, name: Optional[str]) -> None:
+        self._cache[user_id] = (time.monotonic() + self.ttl, name)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def get(self, user_id: int) -> Optional[str]:
+        """Get a user's name without waiting on the api
+
+        If the name isn't known it gets fetched in the background and `None` is returned,
+        so a later render will have the name
+        """
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            return user.name
+        found, name = self._lookup(user_id)
+        if not found:
+            self.queue((user_id,))
+        return name
+
+    def queue(self, user_ids: Iterable[int]) -> None:
+        """Fetch the names of these users in the background"""
+        self._pending.update(dict.fromkeys(user_ids))
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._worker())
+
+    async def resolve_many(self, user_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """Get the names of these users, fetching the ones that aren't cached"""
+        ret: Dict[int, Optional[str]] = {}
+        missing: List[int] = []
+        for user_id in user_ids:
+            user = self.bot.get_user(user_id)
+            if user is not None:
+                ret[user_id] = user.name
+                continue
+            found, name = self._lookup(user_id)
+            if found:
+                ret[user_id] = name
+            else:
+                missing.append(user_id)
+        for index in range(0, len(missing), self.batch_size):
+            batch = missing[index : index + self.batch_size]
+            await asyncio.gather(*map(self._fetch, batch))
+            for user_id in batch:
+                ret[user_id] = self._lookup(user_id)[1]
+        return ret
+
+    async def _fetch(self, user_id: int) -> None:
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.NotFound:
+                name = None
+            except discord.HTTPException as e:
+                # NOTE don't cache this, it'll be tried again the next time it's asked for
+                _log.debug(f"Failed to fetch user {user_id}", exc_info=e)
+                return
+            else:
+                name = user.name
+        self._store(user_id, name)
+
+    async def _worker(self) -> None:
+        while self._pending:
+            batch = list(itertools.islice(self._pending, self.batch_size))
+            for user_id in batch:
+                del self._pending[user_id]
+            await asyncio.gather(*map(self._fetch, batch))
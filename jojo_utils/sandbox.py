@@ -0,0 +1,156 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+# Runs user supplied regex in worker processes so a catastrophic pattern
+# can't block the bot. The workers are only started the first time a search is run
+# and get shut down once nobody has searched for a while.
+# This doesn't depend on any cog so every cog can use it,
+# and the sandbox is kept on the bot so every cog using it shares the same workers
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import multiprocessing as mp
+import os
+from multiprocessing.pool import Pool
+from typing import TYPE_CHECKING, Any, Callable, Final, List, Optional
+
+from ._worker import search_many as _search_many
+
+if TYPE_CHECKING:
+    from redbot.core.bot import Red
+
+__all__ = ("RegexSandbox", "RegexTimeout")
+
+log = logging.getLogger("red.jojocogs.jojo_utils.sandbox")
+# NOTE this lives on the bot so that every cog shares the same workers
+_sandbox_attr: Final[str] = "_jojocogs_regex_sandbox"
+
+
+class RegexTimeout(Exception):
+    """The pattern took too long to run"""
+
+
+class RegexSandbox:
+    """A lazily started pool of worker processes for running regex with a timeout
+
+    Arguments
+    ------------
+    max_workers: the most processes the pool can have
+    idle_timeout: how long the pool can go unused before it's shut down
+    timeout: the default amount of seconds a search can take
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = min(2, os.cpu_count() or 1),
+        idle_timeout: float = 300.0,
+        timeout: float = 2.0,
+    ):
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.users = 0
+        self._pool: Optional[Pool] = None
+        self._running = 0
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+
+    @classmethod
+    def acquire(cls, bot: Red) -> RegexSandbox:
+        """Get the sandbox for this bot, creating it if needed. Call `release` on unload"""
+        sandbox = getattr(bot, _sandbox_attr, None)
+        if sandbox is None:
+            sandbox = cls()
+            setattr(bot, _sandbox_attr, sandbox)
+        sandbox.users += 1
+        return sandbox
+
+    def release(self, bot: Red) -> None:
+        self.users -= 1
+        if self.users > 0:
+            return
+        self.close()
+        if getattr(bot, _sandbox_attr, None) is self:
+            delattr(bot, _sandbox_attr)
+
+    def _get_pool(self) -> Pool:
+        if self._pool is None:
+            log.debug(f"Starting the regex sandbox with {self.max_workers} workers")
+            self._pool = Pool(self.max_workers)
+        return self._pool
+
+    def _schedule_shutdown(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        self._idle_timer = asyncio.get_running_loop().call_later(
+            self.idle_timeout, self._shutdown_idle
+        )
+
+    def _shutdown_idle(self) -> None:
+        self._idle_timer = None
+        if self._running:
+            self._schedule_shutdown()
+            return
+        if self._pool is not None:
+            log.debug("Shutting down the idle regex sandbox")
+            pool, self._pool = self._pool, None
+            pool.close()
+            # NOTE joining waits for the workers to exit, which shouldn't happen on the loop
+            asyncio.get_running_loop().run_in_executor(None, pool.join)
+
+    async def run(
+        self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None
+    ) -> Any:
+        """|coro|
+
+        Run a picklable function in a worker
+
+        Raises
+        ------
+        RegexTimeout
+            The function took longer than `timeout` seconds.
+            The workers get killed as the one running it can't be stopped otherwise
+        """
+        timeout = timeout or self.timeout
+        pool = self._get_pool()
+        self._running += 1
+        try:
+            process = pool.apply_async(func, args)
+            get = functools.partial(process.get, timeout=timeout)
+            return await asyncio.get_running_loop().run_in_executor(None, get)
+        except mp.TimeoutError:
+            if self._pool is pool:
+                self._pool = None
+                # NOTE terminating joins the workers, which shouldn't happen on the loop
+                await asyncio.get_running_loop().run_in_executor(None, pool.terminate)
+            raise RegexTimeout from None
+        finally:
+            self._running -= 1
+            self._schedule_shutdown()
+
+    async def search_many(
+        self, pattern: str, items: List[str], *, timeout: Optional[float] = None
+    ) -> List[int]:
+        """|coro|
+
+        Get the indexes of the items that match `pattern`
+
+        Raises
+        ------
+        re.error
+            The pattern was invalid
+        RegexTimeout
+            The search took too long
+        """
+        return await self.run(_search_many, pattern, items, timeout=timeout)
+
+    def close(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
@@ -0,0 +1,36 @@
+# Copyright (c) 2021 - Amy (jojo7791)
+# Licensed under MIT
+
+import asyncio
+import multiprocessing as mp
+import pathlib
+import subprocess
+import sys
+
+from jojo_utils._worker import search_many
+from jojo_utils.sandbox import RegexSandbox
+
+
+def test_search_many_in_spawned_worker():
+    # NOTE spawned workers import the function's module from scratch, like on Windows and macOS
+    with mp.get_context("spawn").Pool(1) as pool:
+        result = pool.apply_async(search_many, (r"^b", ["apple", "banana", "berry"]))
+        assert result.get(timeout=30) == [1, 2]
+
+
+def test_sandbox_does_not_import_red():
+    # NOTE the sandbox is shared between cogs, so it can't need any of them or Red to load
+    code = "import sys, jojo_utils.sandbox; assert 'redbot' not in sys.modules"
+    root = pathlib.Path(__file__).parent.parent
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=root)
+
+
+def test_sandbox_search_many():
+    async def search():
+        sandbox = RegexSandbox(max_workers=1)
+        try:
+            return await sandbox.search_many(r"an", ["apple", "banana", "mango"])
+        finally:
+            sandbox.close()
+
+    assert asyncio.run(search()) == [1, 2]
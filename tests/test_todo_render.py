@@ -0,0 +1,39 @@
+# Copyright (c) 2021 - Jojo#7791
+# Licensed under MIT
+
+import importlib.util
+from pathlib import Path
+
+# NOTE loaded by path, importing the `todo` package needs Red to be installed
+_spec = importlib.util.spec_from_file_location(
+    "todo_render", Path(__file__).parent.parent / "todo" / "utils" / "render.py"
+)
+render = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(render)
+RenderCache = render.RenderCache
+RenderedPages = render.RenderedPages
+
+
+def test_evicts_as_pages_are_built():
+    cache = RenderCache(max_size=100)
+    old = RenderedPages(iter(["x" * 40]))
+    new = RenderedPages(iter(["y" * 40, "y" * 40]))
+    cache.put(RenderCache.key(1, 0, {}, "todos"), old)
+    cache.put(RenderCache.key(2, 0, {}, "todos"), new)
+    old.get(0)
+    new.get(0)
+    assert len(cache) == 2 and cache.size == 80
+    new.get(1)
+    assert len(cache) == 1 and cache.size == 80
+    assert cache.get(RenderCache.key(1, 0, {}, "todos")) is None
+
+
+def test_evicted_pages_stop_counting():
+    cache = RenderCache(max_size=10)
+    old = RenderedPages(iter(["x" * 20, "x" * 20]))
+    cache.put(RenderCache.key(1, 0, {}, "todos"), old)
+    old.get(0)
+    cache.put(RenderCache.key(2, 0, {}, "todos"), RenderedPages(iter(["y"])))
+    assert cache.size == 0
+    old.get(1)
+    assert cache.size == 0
@@ -0,0 +1,57 @@
+# Copyright (c) 2021 - Jojo#7791
+# Licensed under MIT
+
+import importlib.util
+from pathlib import Path
+
+# NOTE loaded by path, importing the `todo` package needs Red to be installed
+_spec = importlib.util.spec_from_file_location(
+    "todo_storage", Path(__file__).parent.parent / "todo" / "utils" / "storage.py"
+)
+storage = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(storage)
+TodoList = storage.TodoList
+
+
+def _make() -> TodoList:
+    return TodoList.decode(
+        [
+            {"task": "a", "pinned": True, "timestamp": None},
+            {"task": "b", "pinned": False, "timestamp": None},
+            {"task": "c", "pinned": False, "timestamp": None},
+        ]
+    )
+
+
+def test_pin_in_place():
+    todos = _make()
+    record = todos[2]
+    record["pinned"] = True
+    todos[2] = record
+    assert [r.task for r in todos] == ["a", "c", "b"]
+    assert todos.pinned == [todos[0].id, record.id]
+    assert todos[1] is record
+
+
+def test_unpin_in_place():
+    todos = _make()
+    record = todos[0]
+    record["pinned"] = False
+    todos[0] = record
+    assert [r.task for r in todos] == ["a", "b", "c"]
+    assert todos.pinned == []
+    assert record.id in todos.other
+
+
+def test_set_same_section_keeps_position():
+    todos = _make()
+    record = todos[1]
+    record["task"] = "d"
+    todos[1] = record
+    assert [r.task for r in todos] == ["a", "d", "c"]
+    assert todos[1].id == record.id
+
+
+def test_round_trip():
+    todos = _make()
+    assert TodoList.decode(todos.encode()) == todos
@@ -3,10 +3,11 @@
 
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, ABCMeta, abstractmethod
 
 from logging import Logger
-from typing import List, Tuple
+from typing import Iterable, Optional
 
 import discord
 from discord.ext.commands.cog import CogMeta
@@ -15,6 +16,12 @@ from redbot.core.bot import Red
 
 from .utils import TodoApi
 
+try:
+    from cog_shared.jojo_utils.names import NameResolver
+except ImportError:
+    # NOTE ran from a clone of the repo instead of being installed with downloader
+    from jojo_utils.names import NameResolver
+
 """ABCDEFG"""
 
 __all__ = ["TodoMixin", "MetaClass"]
@@ -26,6 +33,8 @@ class TodoMixin(ABC):
     def __init__(self, bot: Red):
         self.bot: Red
         self.cache: TodoApi
+        self._names: NameResolver
+        self._import_task: Optional[asyncio.Task]
         self.config: Config
         self.log: Logger
         self._no_todo_message: str
@@ -33,19 +42,19 @@ class TodoMixin(ABC):
 
     @abstractmethod
     async def page_logic(
-        self, ctx: commands.Context, data: list, title: str, **settings
+        self,
+        ctx: commands.Context,
+        data: Iterable[str],
+        title: str,
+        *,
+        user: Optional[int] = None,
+        view: Optional[str] = None,
+        **settings,
     ) -> None: ...
 
     @abstractmethod
     async def _embed_requested(self, ctx: commands.Context, user: discord.User) -> bool: ...
 
-    @staticmethod
-    @abstractmethod
-    async def _get_todos(
-        todos: List[dict], *, timestamp: bool = False, md: bool = False
-    ) -> Tuple[List[str], ...]:  # type:ignore
-        raise NotImplementedError
-
     @staticmethod
     @abstractmethod
     def _gen_timestamp() -> int:
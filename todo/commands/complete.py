@@ -40,15 +40,7 @@ class Complete(TodoMixin):
         todos = data["todos"]
         if not todos:
             return await ctx.send(self._no_todo_message.format(prefix=ctx.clean_prefix))
-        completed = []
-        indxs.sort(reverse=True)
-        for index in indxs:
-            try:
-                completed.append((todos.pop(index))["task"])
-            except IndexError:
-                pass
-            except Exception as e:
-                self.log.error("Error in command 'todo complete'", exc_info=e)
+        completed = [todo.task for todo in todos.remove_indexes(indxs)]
         amount = len(completed)
         if amount == 0:
             return await ctx.send(
@@ -64,7 +56,6 @@ class Complete(TodoMixin):
         else:
             task = self.bot.loop.create_task(ctx.send_interactive(pagify(msg)))
         data["completed"].extend(completed)
-        data["todos"] = todos
         await self.cache.set_user_data(ctx.author, data)
         await self.cache._maybe_autosort(ctx.author)
         if task is not None and not task.done():
@@ -138,8 +129,15 @@ class Complete(TodoMixin):
         if not completed:
             return await ctx.send(self._no_completed_message.format(prefix=ctx.clean_prefix))
         settings = data["user_settings"]
-        completed = await _format_completed(completed, False, **settings)
-        await self.page_logic(ctx, completed, f"{ctx.author.name}'s Completed Todos", **settings)
+        completed = _format_completed(completed, False, **settings)
+        await self.page_logic(
+            ctx,
+            completed,
+            f"{ctx.author.name}'s Completed Todos",
+            user=ctx.author.id,
+            view="completed",
+            **settings,
+        )
 
     @complete.command(name="reorder", aliases=["move"], usage="<from> <to>")
     async def complete_reorder(
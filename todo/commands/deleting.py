@@ -35,20 +35,11 @@ class Deleting(TodoMixin):
             - `indexes` The indexes of the todos you want to delete
         """
         indexes = [i - 1 for i in indexes]  # type:ignore
-        indexes.sort(reverse=True)  # type:ignore
         data = await self.cache.get_user_data(ctx.author.id)
         todos = data.get("todos")
         if not todos:
             return await ctx.send(self._no_todo_message.format(prefix=ctx.clean_prefix))
-        removed = []
-        for index in indexes:
-            try:
-                removed.append(todos[index]["task"])
-                del todos[index]
-            except IndexError:
-                pass
-            except Exception as e:
-                self.log.error("Exception in 'todo delete'", exc_info=e)
+        removed = [todo.task for todo in todos.remove_indexes(indexes)]
         amount = len(removed)
         if amount == 0:
             return await ctx.send(
@@ -2,14 +2,27 @@
 # Licensed under MIT
 
 import asyncio
-from typing import Final
+import time
+from typing import Any, Awaitable, Callable, Dict, Final, List, Optional, Tuple
 
 from redbot.core import Config, commands
-from redbot.core.utils import AsyncIter
 from redbot.core.utils.predicates import MessagePredicate
 
 from ..abc import TodoMixin
 
+# NOTE how many users get imported and written before the checkpoint is saved
+_IMPORT_BATCH: Final[int] = 100
+# NOTE saved as the checkpoint before the first batch, user ids are never 0
+_IMPORT_STARTED: Final[int] = 0
+
+
+def _legacy_todos(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ret = []
+    for todo in data.get("todos", []):
+        task = todo[1] if isinstance(todo, list) else todo
+        ret.append({"task": task, "pinned": False, "timestamp": None})
+    return ret
+
 
 class Importer(TodoMixin):
     """Import todos from epic guy's todo cog (maybe)"""
@@ -38,21 +51,87 @@ class Importer(TodoMixin):
                 pass
             if not pred.result:
                 return await ctx.send("Okay, I won't import all the todos.")
-        users = await self._epic_guy_config.all_users()
+        if self._import_task is not None and not self._import_task.done():
+            return await ctx.send("I'm already importing todos.")
+        progress_msg = await ctx.send("Importing todos. This may take a while.")
+        last_update = time.monotonic()
+
+        async def report(content: str) -> None:
+            nonlocal last_update
+            if time.monotonic() - last_update < 2:
+                return
+            last_update = time.monotonic()
+            await progress_msg.edit(content=content)
+
+        self._import_task = asyncio.create_task(self._import_all(report))
+        async with ctx.typing():
+            users, todos, elapsed = await self._import_task
         if not users:
             return await ctx.send("There is no user data for me to import.")
-        await ctx.send("Importing todos. This may take a while.")
-        async with ctx.typing():
-            async for uid, todos in AsyncIter(users.items(), steps=100):
-                data = todos["todos"]
-                todos = []
-                for todo in data:
-                    task = todo[1] if isinstance(todo, list) else todo
-                    todos.append({"task": task, "pinned": False, "timestamp": None})
-                u_todos = await self.cache.get_user_item(uid, "todos")
-                u_todos.extend(todos)
-                await self.cache.set_user_item(uid, "todos", u_todos)
-        await ctx.send("I have imported all todos from epic's todo cog.")
+        await ctx.send(
+            f"I have imported {todos} todos for {users} users from epic's todo cog "
+            f"in {elapsed:.2f}s ({users / max(elapsed, 0.001):.0f} users/s)."
+        )
+
+    async def _import_all(
+        self, report: Optional[Callable[[str], Awaitable[Any]]] = None
+    ) -> Tuple[int, int, float]:
+        """Import every user's todos from epic guy's todo cog, a batch of users at a time
+
+        The last user of every batch that's been written is saved, so if the bot restarts
+        the import carries on after them. Returns the amount of users and todos imported
+        and how long it took
+        """
+        checkpoint: Optional[int] = await self.config.import_checkpoint()
+        resuming = checkpoint is not None
+        if checkpoint is None:
+            # NOTE so that a restart during the first batch still resumes the import
+            checkpoint = _IMPORT_STARTED
+            await self.config.import_checkpoint.set(checkpoint)
+        # NOTE config can only give every user at once, but they're let go of once imported
+        legacy = await self._epic_guy_config.all_users()
+        user_ids = sorted(uid for uid in legacy if uid > checkpoint)
+        total = len(user_ids)
+        if resuming:
+            self.log.info(f"Resuming the todo import after user {checkpoint}, {total} users left")
+        imported_users = 0
+        imported_todos = 0
+        start = time.perf_counter()
+        for index in range(0, total, _IMPORT_BATCH):
+            batch = user_ids[index : index + _IMPORT_BATCH]
+            todos = {uid: _legacy_todos(legacy.pop(uid)) for uid in batch}
+            # NOTE shielded so that unloading the cog can't stop a batch after some of its users
+            # were written but before the checkpoint was, which would import them again
+            imported_todos += await asyncio.shield(self._import_batch(todos, batch[-1]))
+            imported_users += len(batch)
+            elapsed = time.perf_counter() - start
+            rate = imported_users / max(elapsed, 0.001)
+            self.log.debug(f"Imported {imported_users}/{total} users ({rate:.0f} users/s)")
+            if report is not None:
+                await report(
+                    f"Imported {imported_users}/{total} users ({imported_todos} todos) "
+                    f"at {rate:.0f} users/s..."
+                )
+        await self.config.import_checkpoint.clear()
+        return imported_users, imported_todos, time.perf_counter() - start
+
+    async def _import_batch(self, todos: Dict[int, List[Dict[str, Any]]], last: int) -> int:
+        added = await self.cache.import_users(todos)
+        await self.config.import_checkpoint.set(last)
+        return added
+
+    def _import_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if (exc := task.exception()) is not None:
+            self.log.error("Failed to import todos from epic guy's todo cog", exc_info=exc)
+
+    async def _resume_import(self) -> None:
+        """Carry on with an import that was stopped by the bot restarting"""
+        if await self.config.import_checkpoint() is None:
+            return
+        users, todos, elapsed = await self._import_all()
+        self.log.info(f"Finished importing {todos} todos for {users} users in {elapsed:.2f}s")
 
     @todo.command(name="import")
     async def todo_import(self, ctx: commands.Context, confirm: bool = False):
@@ -82,7 +161,6 @@ class Importer(TodoMixin):
             return await ctx.send(not_found)
         elif not (todos := data.get("todos")):
             return await ctx.send(not_found)
-        current_todos = await self.cache.get_user_item(ctx.author, "todos")
         payload = []
         async with ctx.typing():
             for todo in todos:
@@ -92,7 +170,5 @@ class Importer(TodoMixin):
                 payload.append(
                     {"task": to_add, "pinned": False, "timestamp": self._gen_timestamp()}
                 )
-            current_todos.extend(payload)
         await ctx.send("Done. I have imported your todos")
-        await self.cache.set_user_item(ctx.author, "todos", current_todos)
-        await self.cache._maybe_autosort(ctx.author)
+        await self.cache.add_todos(ctx.author, payload)
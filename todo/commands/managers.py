@@ -65,10 +65,11 @@ class Managers(TodoMixin):
                     f" Use `{ctx.clean_prefix}todo manager add` to add a user to your todo list's managers"
                 )
             )
+        # NOTE managers who left every guild the bot is in get fetched in batches
+        await self._names.resolve_many(managers)
         managers = [f"{self._get_user_name(i)} | ({i})" for i in managers]
 
         await self.page_logic(ctx, managers, f"{ctx.author.name}'s Todo Managers", **settings)
 
     def _get_user_name(self, user_id: int) -> str:
-        user = self.bot.get_user(user_id)
-        return user.name if user is not None else "Unknown or Deleted User"
+        return self._names.get(user_id) or "Unknown or Deleted User"
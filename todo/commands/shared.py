@@ -1,6 +1,7 @@
 # Copyright (c) 2021 - Jojo#7791
 # Licensed under MIT
 
+import itertools
 from typing import Optional
 
 import discord
@@ -9,7 +10,7 @@ from redbot.core.utils.chat_formatting import pagify
 
 from ..abc import TodoMixin
 from ..utils import NonBotMember, PositiveInt, ViewTodo, timestamp_format
-from ..utils.formatting import _format_completed, _format_todos
+from ..utils.formatting import _format_completed, _format_results, _format_todos
 
 
 class SharedTodos(TodoMixin):
@@ -56,13 +57,12 @@ class SharedTodos(TodoMixin):
         """
         pinned = bool(pinned)
         data = await self.cache.get_user_data(user.id)
-        todos: list = data["todos"] or []
         managers = data["managers"]
         if not managers or ctx.author.id not in managers:
             return await ctx.send("You are not a manager of that user's todo list")
 
-        todos.append({"task": todo, "pinned": pinned, "timestamp": self._gen_timestamp()})
-        await self.cache.set_user_item(user, "todos", todos)
+        payload = {"task": todo, "pinned": pinned, "timestamp": self._gen_timestamp()}
+        await self.cache.add_todos(user, [payload])
 
         data = data["user_settings"]
 
@@ -78,7 +78,6 @@ class SharedTodos(TodoMixin):
             task = self.bot.loop.create_task(ctx.send_interactive(pagify(msg)))
         else:
             await ctx.send(msg)
-        await self.cache._maybe_autosort(user)
         if task is not None:
             await task
 
@@ -176,18 +175,54 @@ class SharedTodos(TodoMixin):
                 )
             return await self.page_logic(
                 ctx,
-                await _format_completed(completed, **settings),
+                _format_completed(completed, **settings),
                 f"{user.name}'s Completed Todos",
+                user=user.id,
+                view="completed",
                 **settings,
             )
 
-        pinned, other = await self._get_todos(
-            todos, timestamp=settings["use_timestamps"], md=settings["use_markdown"]
-        )
-        todos = await _format_todos(pinned, other, **settings)
+        lines = _format_todos(todos, **settings)
         if completed and settings["combine_lists"]:
-            todos.extend(await _format_completed(completed, combined=True, **settings))
-        await self.page_logic(ctx, todos, title=f"{user.display_name}'s Todos", **settings)
+            lines = itertools.chain(lines, _format_completed(completed, combined=True, **settings))
+        await self.page_logic(
+            ctx,
+            lines,
+            title=f"{user.display_name}'s Todos",
+            user=user.id,
+            view="todos",
+            **settings,
+        )
+
+    @shared.command(name="search")
+    async def todo_shared_search(self, ctx: commands.Context, user: NonBotMember, *, query: str):
+        """Search a user's list that you manage
+
+        This searches their completed todos as well, with the best matches first
+
+        **Arguments**
+            - `user` A user who you manage a list for. This **cannot** be a bot.
+            - `query` The words to search for.
+        """
+        data = await self.cache.get_user_data(user.id)
+        managers = data["managers"]
+        settings = data["user_settings"]
+
+        if not managers or ctx.author.id not in managers:
+            return await ctx.send("You are not a manager of that user's list")
+        elif not data["todos"] and not data["completed"]:
+            return await ctx.send(
+                self._no_todo_shared_message.format(user=user, prefix=ctx.clean_prefix)
+            )
+        results = await self.cache.query_list(user, regex=False, query=query)
+        if not results:
+            return await ctx.send("I could not find any todos matching that query")
+        await self.page_logic(
+            ctx,
+            _format_results(results, **settings),
+            title=f"{user.display_name}'s Todos matching that query",
+            **settings,
+        )
 
     @shared.command(name="remove", aliases=["del", "delete"], require_var_positional=True)
     async def todo_shared_delete(
@@ -214,12 +249,7 @@ class SharedTodos(TodoMixin):
                 self._no_todo_shared_message.format(user=user, prefix=ctx.clean_prefix)
             )
 
-        tasks = []
-        for index in indexes:
-            try:
-                tasks.append(todos.pop(index)["task"])
-            except IndexError:
-                pass
+        tasks = [todo.task for todo in todos.remove_indexes(indexes)]
 
         if not tasks:
             those_that = "Those" if len(indexes) > 1 else "That"
@@ -268,14 +298,7 @@ class SharedTodos(TodoMixin):
         elif not todos:
             return await ctx.send(self._no_todo_message.format(prefix=ctx.clean_prefix))
 
-        comped = []
-        for index in indexes:
-            try:
-                task = todos.pop(index)
-            except IndexError:
-                pass
-            else:
-                comped.append(task["task"])
+        comped = [todo.task for todo in todos.remove_indexes(indexes)]
         amount = len(comped)
         completed.extend(comped)
         if amount == 0:
@@ -319,5 +342,12 @@ class SharedTodos(TodoMixin):
         elif not completed:
             return await ctx.send(self._no_completed_message.format(prefix=ctx.clean_prefix))
 
-        completed = await _format_completed(completed, **settings)
-        await self.page_logic(ctx, completed, f"{user.display_name}'s Completed Todos", **settings)
+        completed = _format_completed(completed, **settings)
+        await self.page_logic(
+            ctx,
+            completed,
+            f"{user.display_name}'s Completed Todos",
+            user=user.id,
+            view="completed",
+            **settings,
+        )
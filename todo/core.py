@@ -2,14 +2,18 @@
 # Licensed under MIT
 
 import asyncio
+import itertools
 import logging
+import time
 from contextlib import suppress
 from datetime import datetime, timezone
-from typing import List, Literal, Optional, Tuple, TYPE_CHECKING
+from typing import Iterable, Literal, Optional, TYPE_CHECKING
 
+import aiohttp
 import discord
 from redbot.core import Config, commands
 from redbot.core.bot import Red
+from redbot.core.utils import AsyncIter
 from redbot.core.utils.chat_formatting import humanize_list, pagify, text_to_file
 from redbot.core.utils.predicates import MessagePredicate
 
@@ -27,17 +31,25 @@ from .commands import (
 )
 from .consts import __authors__, __version__, config_structure
 from .utils import (
+    ImportResult,
     PositiveInt,
-    TimestampFormats,
     TodoApi,
     TodoMenu,
     TodoPages,
     ViewTodo,
     PrivateMenuStarter,
     formatting,
+    iter_attachment_lines,
+    parse_todos,
     timestamp_format,
 )
 
+try:
+    from cog_shared.jojo_utils.names import NameResolver
+except ImportError:
+    # NOTE ran from a clone of the repo instead of being installed with downloader
+    from jojo_utils.names import NameResolver
+
 
 def attach_or_in_dm(ctx: commands.Context) -> bool:
     if not ctx.guild:
@@ -73,13 +85,29 @@ class ToDo(
         self.bot = bot
         self.config = Config.get_conf(self, 19924714019, True)
         self.config.register_user(**config_structure)
+        # NOTE the last user written by `[p]todo importall`, see `Importer._import_all`
+        self.config.register_global(schema_version=0, import_checkpoint=None)
         self.cache = TodoApi(self.bot, self.config)
+        self._names = NameResolver.acquire(self.bot)
         self.log = logging.getLogger("red.JojoCogs.todo")
+        self._migration_task: Optional[asyncio.Task] = None
+        self._import_task: Optional[asyncio.Task] = None
 
     async def cog_unload(self) -> None:
+        if self._migration_task is not None:
+            self._migration_task.cancel()
+        if self._import_task is not None:
+            self._import_task.cancel()
         with suppress(KeyError):
             self.bot.remove_dev_env_value("todo")
-        self.cache._pool.close()
+        self.cache._sandbox.release(self.bot)
+        await self.cache.close()
+        self._names.release()
+
+    async def cog_after_invoke(self, ctx: commands.Context) -> None:
+        # NOTE everything a command changed gets written at once
+        if self.cache.flush_policy != "unload":
+            await self.cache.flush()
 
     def format_help_for_context(self, ctx: commands.Context) -> str:
         pre = super().format_help_for_context(ctx)  # type:ignore
@@ -102,6 +130,10 @@ class ToDo(
     async def cog_load(self) -> None:
         with suppress(RuntimeError):
             self.bot.add_dev_env_value("todo", lambda x: self)
+        # NOTE this can take a while on big bots so it's done in the background
+        self._migration_task = asyncio.create_task(self.cache.migrate())
+        self._import_task = asyncio.create_task(self._resume_import())
+        self._import_task.add_done_callback(self._import_done)
 
     @commands.group(invoke_without_command=True)
     @commands.bot_has_permissions(add_reactions=True)
@@ -138,12 +170,9 @@ class ToDo(
             - `todo` The todo task
         """
         data = await self.cache.get_user_data(ctx.author.id)
-        if not data["todos"]:
-            data["todos"] = []
         pinned = bool(pinned)
         payload = {"task": todo, "pinned": pinned, "timestamp": self._gen_timestamp()}
-        data["todos"].append(payload)
-        await self.cache.set_user_item(ctx.author, "todos", data["todos"])
+        await self.cache.add_todos(ctx.author, [payload])
 
         data = data["user_settings"]
         msg = "Added that as a todo."
@@ -155,7 +184,6 @@ class ToDo(
             await ctx.send_interactive(pagify(msg))
         else:
             await ctx.send(msg)
-        await self.cache._maybe_autosort(ctx.author)
 
     @todo.command(name="list")
     async def todo_list(self, ctx: commands.Context):
@@ -173,17 +201,11 @@ class ToDo(
         elif not todos:
             return await ctx.invoke(self.complete_list)
 
-        pinned, todos = await self._get_todos(
-            todos,
-            timestamp=user_settings["use_timestamps"],
-            md=user_settings["use_markdown"],
-        )
-        todos = await formatting._format_todos(pinned, todos, **user_settings)
+        lines = formatting._format_todos(todos, **user_settings)
         if completed and user_settings["combine_lists"]:
-            completed = await formatting._format_completed(
-                completed, combined=True, **user_settings
+            lines = itertools.chain(
+                lines, formatting._format_completed(completed, combined=True, **user_settings)
             )
-            todos.extend(completed)
 
         name = ctx.author.name
         display_name = ctx.author.display_name
@@ -192,7 +214,9 @@ class ToDo(
             names = name + plural
         else:
             names = f"{display_name}{plural} ({name})"
-        await self.page_logic(ctx, todos, f"{names} Todos", **user_settings)
+        await self.page_logic(
+            ctx, lines, f"{names} Todos", user=ctx.author.id, view="todos", **user_settings
+        )
 
     @todo.command(name="multiadd")
     async def todo_multi_add(self, ctx: commands.Context, *, todos: Optional[str] = None):
@@ -209,7 +233,7 @@ class ToDo(
             - `todos` The todos you want to add.
             This is an optional argument and you can upload, or reply to a message with, a file instead
         """
-        data: bytes
+        maybe_file: Optional[discord.Attachment] = None
         if ctx.message.reference and not any([todos is not None, ctx.message.attachments]):
             # Message references get checked first
             msg = ctx.message.reference.resolved
@@ -217,35 +241,55 @@ class ToDo(
                 assert isinstance(msg, discord.Message), "mpy"
             if not msg.attachments:
                 return await ctx.send("That message does not have files!")
-            maybe_file: discord.Attachment = msg.attachments[0]
-            if not maybe_file.filename.endswith(".txt"):
-                return await ctx.send("File format must be `.txt`")
-            data = await maybe_file.read()
-            todos = data.decode()
+            maybe_file = msg.attachments[0]
         elif ctx.message.attachments:
             maybe_file = ctx.message.attachments[0]
-            if not maybe_file.filename.endswith(".txt"):
-                return await ctx.send("File format must be `.txt`")
-            data = await maybe_file.read()
-            todos = data.decode()
         elif todos is None:  # No files or anything
             raise commands.UserInputError
-        todos = [
-            {
-                "pinned": False,
-                "task": t.replace("\\n", "\n"),
-                "timestamp": self._gen_timestamp(),
-            }
-            for t in todos.split("\n")  # type:ignore
-            if t
-        ]
-        current = await self.cache.get_user_item(ctx.author, "todos")
-        if not current:
-            current = []
-        current.extend(todos)
-        await self.cache.set_user_item(ctx.author, "todos", current)
-        await ctx.send("Done. Added those as todos")
-        await self.cache._maybe_autosort(ctx.author)
+        if maybe_file is not None and not maybe_file.filename.endswith(".txt"):
+            return await ctx.send("File format must be `.txt`")
+
+        result = ImportResult()
+        timestamp = self._gen_timestamp()
+        if maybe_file is None:
+            lines = AsyncIter(todos.split("\n"))  # type:ignore
+            batches = parse_todos(lines, result, timestamp=timestamp)
+            added = await self.cache.import_todos(ctx.author, batches)
+            return await ctx.send(self._multi_add_message(added, result))
+
+        # NOTE files are streamed in, so a big file is added a batch at a time
+        progress_msg: Optional[discord.Message] = None
+        last_update = time.monotonic()
+
+        async def progress(amount: int) -> None:
+            nonlocal progress_msg, last_update
+            if time.monotonic() - last_update < 2:
+                return
+            last_update = time.monotonic()
+            content = f"Added {amount} todos so far..."
+            if progress_msg is None:
+                progress_msg = await ctx.send(content)
+            else:
+                await progress_msg.edit(content=content)
+
+        batches = parse_todos(iter_attachment_lines(maybe_file), result, timestamp=timestamp)
+        try:
+            async with ctx.typing():
+                added = await self.cache.import_todos(ctx.author, batches, progress=progress)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.log.error("Failed to read a multiadd file", exc_info=e)
+            return await ctx.send(
+                f"I couldn't read the rest of that file. I added {result.parsed} todos before "
+                "running into an error"
+            )
+        await ctx.send(self._multi_add_message(added, result))
+
+    @staticmethod
+    def _multi_add_message(added: int, result: ImportResult) -> str:
+        msg = f"Done. Added {added} todos"
+        if result.skipped:
+            msg += f" and skipped {result.skipped} that were too long"
+        return msg
 
     @todo.command(name="gettodos", aliases=["todotofile"])
     @commands.check(attach_or_in_dm)
@@ -254,7 +298,6 @@ class ToDo(
 
         This is handy for moving todos over from bot to bot
         """
-        await self.cache._maybe_fix_todos(ctx.author.id)
         todos = await self.cache.get_user_item(ctx.author, "todos")
         if not todos:
             return await ctx.send(self._no_todo_message.format(prefix=ctx.clean_prefix))
@@ -277,8 +320,6 @@ class ToDo(
             todo = todos.pop(act_index)
         except IndexError:
             return await ctx.send("That index was bigger than your todo list!")
-        if not isinstance(todo, dict):
-            todo = {"task": str(todo), "pinned": False}
         todo["pinned"] = not todo["pinned"]
         pinned = "" if todo["pinned"] else "un"
         await ctx.send(f"Done. That todo is now {pinned}pinned")
@@ -341,59 +382,56 @@ class ToDo(
     async def todo_search(self, ctx: commands.Context, regex: Optional[bool], *, query: str):
         """Query your todo list for todos containing certain words
 
+        This searches your completed todos as well, with the best matches first.
+        Words match the start of longer words,
+        and if nothing matches then similarly spelt words are tried
+
         **Arguments**
+            - `regex` Whether the query is a regex pattern. Defaults to False.
             - `query` The words to search for.
         """
-        if not (todos := await self.cache.get_user_item(ctx.author, "todos")):
+        data = await self.cache.get_user_data(ctx.author.id)
+        if not data["todos"] and not data["completed"]:
             return await ctx.send(self._no_todo_message.format(prefix=ctx.clean_prefix))
-        await ctx.send("This might take a while...")
-        async with ctx.typing():
-            todos = await self.cache.query_list(ctx.author, regex=bool(regex), query=query)
-        if not todos:
+        if regex:
+            async with ctx.typing():
+                results = await self.cache.query_list(ctx.author, regex=True, query=query)
+        else:
+            results = await self.cache.query_list(ctx.author, regex=False, query=query)
+        if not results:
             return await ctx.send("I could not find any todos matching that query")
-        user_settings = await self.cache.get_user_item(ctx.author, "user_settings")
-        pinned, todos = await self._get_todos(
-            todos, timestamp=user_settings["use_timestamps"], md=user_settings["use_markdown"]
+        user_settings = data["user_settings"]
+        await self.page_logic(
+            ctx,
+            formatting._format_results(results, **user_settings),
+            title="Todos matching that query",
+            **user_settings,
         )
-        todos = await formatting._format_todos(pinned, todos, **user_settings)
-        await self.page_logic(ctx, todos, title="Todos matching that query", **user_settings)
-
-    @staticmethod
-    async def _get_todos(
-        todos: List[dict], *, timestamp: bool = False, md: bool = False
-    ) -> Tuple[List[str], ...]:
-        """An internal function to get todos sorted by pins"""
-        pinned: List[str] = []
-        extra: List[str] = []
-        for todo in todos:
-            if not isinstance(todo, dict):
-                extra.append(str(todo))
-                continue
-            task = todo["task"]
-            if timestamp:
-                task = (
-                    f"{task} - {timestamp_format(ts, ts_format=TimestampFormats.RELATIVE_TIME)}"
-                    if (ts := todo.get("timestamp")) and not md
-                    else task
-                )
-            if todo["pinned"]:
-                pinned.append(task)
-            else:
-                extra.append(task)
-        return pinned, extra
 
     @staticmethod
     def _gen_timestamp():
         return int(datetime.now(tz=timezone.utc).timestamp())
 
-    async def page_logic(self, ctx: commands.Context, data: list, title: str, **settings) -> None:
-        joined = "\n".join(data)
-        pagified = list(pagify(joined, page_length=300))
-        pages = TodoPages(pagified, title, settings)
+    async def page_logic(
+        self,
+        ctx: commands.Context,
+        data: Iterable[str],
+        title: str,
+        *,
+        user: Optional[int] = None,
+        view: Optional[str] = None,
+        **settings,
+    ) -> None:
+        # NOTE the lines are only formatted and paged as the menu gets to them
+        pages = formatting._paginate(data)
+        if user is not None and view is not None:
+            # NOTE if these pages were cached `data` never gets read
+            pages = self.cache.get_pages(user, view, settings, pages)
+        source = TodoPages(pages, title, settings)
         if settings["private"]:
-            await PrivateMenuStarter(ctx, pages).start()
+            await PrivateMenuStarter(ctx, source).start()
             return
-        await TodoMenu(pages, self.bot, ctx).start()
+        await TodoMenu(source, self.bot, ctx).start()
 
     async def _embed_requested(self, ctx: commands.Context, user: discord.User) -> bool:
         """An slightly rewritten method for checking if a command should embed or not"""
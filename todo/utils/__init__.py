@@ -1,4 +1,8 @@
 from .api import *
 from .converters import *
 from .general import *
+from .importing import *
 from .menus import *
+from .render import *
+from .search import *
+from .storage import *
@@ -28,19 +28,20 @@
 from __future__ import annotations
 
 import asyncio
-import functools
 import logging
-import multiprocessing as mp
-from multiprocessing.pool import Pool
+from collections import OrderedDict
 from typing import (
     Any,
-    AsyncGenerator,
+    AsyncIterable,
+    Awaitable,
     Callable,
     Coroutine,
     Dict,
     Iterable,
     List,
+    Literal,
     Optional,
+    Set,
     Tuple,
     TypeVar,
     Union,
@@ -49,8 +50,18 @@ from typing import (
 import discord
 from redbot.core import Config, commands
 from redbot.core.bot import Red
+from redbot.core.utils import AsyncIter
 
 from ..consts import config_structure
+from .render import RenderCache, RenderedPages
+from .search import SearchIndex, SearchResults
+from .storage import TodoList
+
+try:
+    from cog_shared.jojo_utils.sandbox import RegexSandbox, RegexTimeout
+except ImportError:
+    # NOTE ran from a clone of the repo instead of being installed with downloader
+    from jojo_utils.sandbox import RegexSandbox, RegexTimeout
 
 try:
     import regex as re
@@ -58,7 +69,9 @@ except ImportError:
     import re  # type:ignore
 
 User = Union[int, discord.Member, discord.User]
+FlushPolicy = Literal["immediate", "debounced", "unload"]
 __all__ = [
+    "FlushPolicy",
     "TodoApi",
 ]
 
@@ -72,14 +85,50 @@ All this is to say that I don't know why I built this cog and I hate myself :D
 """
 
 log = logging.getLogger("red.jojocogs.todo.api")
+# NOTE bump this and add to `_fix_todos` when the way todos are saved changes
+_SCHEMA_VERSION = 1
+_MIGRATION_BATCH = 100
 T = TypeVar("T")
 Coro = Callable[..., Coroutine[Any, Any, T]]
 
 
-async def async_filter(async_pred: Coro, iterable: Iterable[Any]) -> AsyncGenerator[Any, None]:
-    for item in iterable:
-        if await async_pred(item):
-            yield item
+def _bisect_task(todos: TodoList, task: str, lo: int, hi: int, reverse: bool) -> int:
+    """Find where a task goes in `todos[lo:hi]`, which is sorted by task
+
+    NOTE `bisect`'s key argument is 3.10+ and the reverse order would need a wrapper anyway
+    """
+    while lo < hi:
+        mid = (lo + hi) // 2
+        other = todos[mid]["task"]
+        if (task > other) if reverse else (task < other):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def _fix_todos(todos: Any) -> Tuple[List[Dict[str, Any]], bool]:
+    """Fix todos saved by older versions of this cog, returns the todos and if anything changed"""
+    if not isinstance(todos, list):
+        # Super fucked todos
+        return [], True
+    changed = False
+    for num, todo in enumerate(todos):
+        if not isinstance(todo, dict):
+            todos[num] = {"task": todo, "pinned": False, "timestamp": None}
+            changed = True
+            continue
+        if "pinned" not in todo:
+            todo["pinned"] = False
+            changed = True
+        if (ts := todo.get("timestamp")) and not isinstance(ts, int):
+            try:
+                ts = int(ts)
+            except ValueError:
+                ts = None
+            todo["timestamp"] = ts
+            changed = True
+    return todos, changed
 
 
 class InvalidRegex(commands.UserFeedbackCheckFailure):
@@ -88,13 +137,47 @@ class InvalidRegex(commands.UserFeedbackCheckFailure):
 
 
 class TodoApi:
-    r"""An API for todo that interacts with the config of Todo."""
-
-    def __init__(self, bot: Red, config: Config):
+    r"""An API for todo that interacts with the config of Todo.
+
+    The cached data is the source of truth, changes are only written to config when flushed.
+    With the "immediate" flush policy that's after every change, with "debounced"
+    it's `flush_delay` seconds after the last change, and with "unload" it's when the cog unloads.
+    Either way the cog flushes after each command, so a command writes once.
+
+    Every user has a revision which goes up whenever their data changes,
+    rendered pages are cached against it so an unchanged list isn't formatted again.
+    """
+
+    def __init__(
+        self,
+        bot: Red,
+        config: Config,
+        *,
+        flush_policy: FlushPolicy = "debounced",
+        flush_delay: float = 5.0,
+        max_indexes: int = 500,
+    ):
         self.bot = bot
         self.config = config
+        self.flush_policy = flush_policy
+        self.flush_delay = flush_delay
         self._data: Dict[int, Dict[str, Any]] = {}
-        self._pool: Pool = Pool()
+        self._dirty: Dict[int, Set[str]] = {}
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        self._migrated = False
+        # NOTE users whose todos are known to have the pinned todos first, mapped to
+        # the `reverse_sort` they're sorted with or `None` if they aren't sorted
+        self._sorted: Dict[int, Optional[bool]] = {}
+        # NOTE these are never reset, otherwise an old render could match a new revision
+        self._revisions: Dict[int, int] = {}
+        self._renders = RenderCache()
+        # NOTE only users who have searched get an index, and only the
+        # `max_indexes` users who searched most recently keep theirs
+        self.max_indexes = max_indexes
+        self._indexes: OrderedDict[int, SearchIndex] = OrderedDict()
+        # NOTE the workers aren't started until someone searches with regex
+        self._sandbox = RegexSandbox.acquire(bot)
         self._loop: asyncio.AbstractEventLoop = self.bot.loop
 
     async def delete_data(self, user_id: int) -> None:
@@ -107,6 +190,10 @@ class TodoApi:
         user_id: :class:`int`
             The user to clear the data for
         """
+        self._dirty.pop(user_id, None)
+        self._sorted.pop(user_id, None)
+        self._indexes.pop(user_id, None)
+        self._bump(user_id)
         await self.config.user_from_id(user_id).clear()
         self._data.pop(user_id, None)
 
@@ -214,11 +301,169 @@ class TodoApi:
         if user is not None and not isinstance(user, int):
             raise TypeError(f"User must be int not {user.__class__!r}")
         if not user:
-            self._data = await self.config.all_users()
+            data = await self.config.all_users()
+            # NOTE don't throw away changes that haven't been written yet
+            unsaved = {uid for uid in self._dirty if uid in self._data}
+            for uid, user_data in data.items():
+                if uid in unsaved:
+                    continue
+                if not self._migrated:
+                    # NOTE same as a single user, see below
+                    user_data["todos"], fixed = _fix_todos(user_data["todos"])
+                    if fixed:
+                        self._mark_dirty(uid, "todos")
+                user_data["todos"] = TodoList.decode(user_data["todos"])
+            for uid in unsaved:
+                data[uid] = self._data[uid]
+            self._data = data
+            self._renders.clear()
+            return
+        data = await self.config.user_from_id(user).all()
+        if not self._migrated:
+            # NOTE this user might not have been migrated yet, see `migrate`
+            data["todos"], fixed = _fix_todos(data["todos"])
+            if fixed:
+                self._mark_dirty(user, "todos")
+        data["todos"] = TodoList.decode(data["todos"])
+        self._data[user] = data
+        self._bump(user)
+
+    async def migrate(self) -> None:
+        """|coro|
+
+        Fix up every user's todos from older versions of this cog, once.
+
+        Users get migrated in batches and the schema version gets stamped once they're all done,
+        so the next time this runs it doesn't have to do anything.
+        Users who get loaded while this is running are fixed when they're loaded
+        """
+        if await self.config.schema_version() >= _SCHEMA_VERSION:
+            self._migrated = True
             return
-        self._data[user] = await self.config.user_from_id(user).all()
+        all_users = await self.config.all_users()
+        total = len(all_users)
+        log.info(f"Migrating the todo lists of {total} users to schema {_SCHEMA_VERSION}")
+        fixed_users = 0
+        async for index, (uid, data) in AsyncIter(
+            enumerate(all_users.items(), 1), steps=_MIGRATION_BATCH
+        ):
+            if index % (_MIGRATION_BATCH * 10) == 0:
+                log.info(f"Migrated {index}/{total} users")
+            if uid in self._data:
+                # NOTE already fixed when they were loaded, and this copy might be outdated
+                continue
+            todos, fixed = _fix_todos(data["todos"])
+            if fixed:
+                await self.config.user_from_id(uid).todos.set(todos)
+                fixed_users += 1
+        await self.config.schema_version.set(_SCHEMA_VERSION)
+        self._migrated = True
+        log.info(f"Finished migrating, fixed the todos of {fixed_users}/{total} users")
+
+    def _mark_dirty(self, user: int, *keys: str) -> None:
+        # NOTE everything that changes a user's data goes through here
+        self._dirty.setdefault(user, set()).update(keys)
+        self._bump(user)
+
+    def _bump(self, user: int) -> None:
+        self._revisions[user] = self._revisions.get(user, 0) + 1
+
+    def revision(self, user: User) -> int:
+        """Get the revision of a user's data, which changes whenever their data does"""
+        return self._revisions.get(self._get_user(user), 0)
+
+    def get_pages(
+        self, user: User, view: str, settings: Dict[str, Any], pages: Iterable[str]
+    ) -> RenderedPages:
+        """Get the rendered pages of a user's list, rendering `pages` if they aren't cached
 
-    async def set_user_item(self, user: User, key: str, data: Any, *, fix: bool = True) -> None:
+        Arguments
+        ---------
+        user: :class:`int`|:class:`User`|:class:`Member`
+            The user whose list is being shown
+        view: :class:`str`
+            What's being shown, like "todos" or "completed"
+        settings: :class:`dict`
+            The settings the list is rendered with
+        pages: Iterable[:class:`str`]
+            The pages, these are only read if there's nothing cached
+        """
+        uid = self._get_user(user)
+        key = self._renders.key(uid, self.revision(uid), settings, view)
+        if (rendered := self._renders.get(key)) is not None:
+            return rendered
+        rendered = RenderedPages(pages)
+        self._renders.put(key, rendered)
+        return rendered
+
+    async def _changed(self, user: int) -> None:
+        if self.flush_policy == "immediate":
+            await self.flush(user)
+        elif self.flush_policy == "debounced":
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.flush_delay, self._flush_later
+            )
+
+    def _flush_later(self) -> None:
+        self._flush_timer = None
+        task = asyncio.create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._flush_tasks.discard(task)
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            # NOTE the changes are still dirty, so they'll be written by the next flush
+            log.error("Failed to write todo data", exc_info=exc)
+
+    async def flush(self, user: Optional[User] = None) -> None:
+        """|coro|
+
+        Write the changed data of a user, or every user, to config
+
+        Arguments
+        ---------
+        user: Optional[:class:`int`|:class:`User`|:class:`Member`]
+            The user to write the data of. If this isn't given, every user's changes are written
+        """
+        if user is None:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            users = list(self._dirty)
+        else:
+            users = [self._get_user(user)]
+        for uid in users:
+            keys = self._dirty.pop(uid, None)
+            data = self._data.get(uid)
+            if not keys or data is None:
+                continue
+            conf = self.config.user_from_id(uid)
+            try:
+                if len(keys) == 1:
+                    (key,) = keys
+                    value = data[key]
+                    await conf.set_raw(key, value=value.encode() if key == "todos" else value)
+                else:
+                    await conf.set({**data, "todos": data["todos"].encode()})
+            except BaseException:
+                # NOTE nothing was written, so the next flush has to write these again
+                self._dirty.setdefault(uid, set()).update(keys)
+                raise
+
+    async def close(self) -> None:
+        """|coro|
+
+        Wait for any flush that's running and write everything that's left.
+        This should be called when the cog unloads
+        """
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self.flush()
+
+    async def set_user_item(self, user: User, key: str, data: Any) -> None:
         """|coro|
 
         Save a user item via key
@@ -240,10 +485,15 @@ class TodoApi:
         user = self._get_user(user)
         if key not in config_structure.keys():
             raise KeyError(f"'{key}' is not a registered value or group")
-        await self.config.user_from_id(user).set_raw(key, value=data)
-        await self._load_items(user=user)
-        if key == "todos" and fix:
-            await self._maybe_fix_todos(user)
+        user_data = await self.get_user_data(user)
+        if key == "todos" and not isinstance(data, TodoList):
+            data = TodoList.decode(data)
+        user_data[key] = data
+        self._mark_dirty(user, key)
+        if key == "todos":
+            # NOTE this could be in any order now
+            self._sorted.pop(user, None)
+        await self._changed(user)
 
     async def set_user_data(self, user: User, data: Dict[str, Any]) -> None:
         """|coro|
@@ -258,9 +508,12 @@ class TodoApi:
             The data to save to the user's config
         """
         user = self._get_user(user)
-        await self.config.user_from_id(user).set(data)
-        await self._load_items(user=user)
-        await self._maybe_fix_todos(user)
+        if not isinstance(data["todos"], TodoList):
+            data["todos"] = TodoList.decode(data["todos"])
+        self._data[user] = data
+        self._mark_dirty(user, *config_structure.keys())
+        self._sorted.pop(user, None)
+        await self._changed(user)
 
     async def set_user_setting(self, user: User, key: str, setting: Any) -> None:
         """|coro|
@@ -319,15 +572,157 @@ class TodoApi:
         """An internal function to get a user id based off of the type"""
         return user if isinstance(user, int) else user.id
 
-    async def _maybe_autosort(self, user: Union[discord.Member, discord.User]) -> None:
+    async def add_todos(self, user: User, todos: List[Dict[str, Any]]) -> None:
+        """|coro|
+
+        Add todos to a user's list, keeping pinned todos first and the list sorted
+        if the user has autosorting on.
+
+        Each todo gets inserted where it belongs, so the list only gets fully sorted
+        when its order isn't known, like after `reverse_sort` changed
+
+        Arguments
+        ---------
+        user: :class:`int`|:class:`User`|:class:`Member`
+            The user to add the todos to
+        todos: List[:class:`dict`]
+            The todos to add
+        """
+        uid = self._get_user(user)
+        data = await self.get_user_data(uid)
+        current: TodoList = data["todos"]
+        settings = data["user_settings"]
+        autosort = settings["autosorting"]
+        order = settings["reverse_sort"] if autosort else None
+        if uid not in self._sorted or self._sorted[uid] != order or len(todos) > len(current):
+            # NOTE adding more than there already are is faster with a single sort
+            current.extend(todos)
+            self._mark_dirty(uid, "todos")
+            await self._maybe_autosort(uid)
+            return
+
+        pinned_end = len(current.pinned)
+        for todo in todos:
+            if todo["pinned"]:
+                lo, hi = 0, pinned_end
+                pinned_end += 1
+            else:
+                lo, hi = pinned_end, len(current)
+            index = _bisect_task(current, todo["task"], lo, hi, order) if autosort else hi
+            current.insert(index, todo)
+        self._mark_dirty(uid, "todos")
+        await self._changed(uid)
+
+    async def import_todos(
+        self,
+        user: User,
+        batches: AsyncIterable[List[Dict[str, Any]]],
+        *,
+        progress: Optional[Callable[[int], Awaitable[Any]]] = None,
+    ) -> int:
+        """|coro|
+
+        Add batches of todos to a user's list as they come in.
+
+        The todos are appended without sorting and the list is sorted once at the end,
+        if the user has autosorting on, so the changes only get written once
+
+        Arguments
+        ---------
+        user: :class:`int`|:class:`User`|:class:`Member`
+            The user to add the todos to
+        batches: AsyncIterable[List[:class:`dict`]]
+            The todos to add, see :func:`parse_todos`
+        progress: Optional[Callable[[:class:`int`], Awaitable]]
+            Called with the amount of todos added so far after every batch
+
+        Returns
+        -------
+        :class:`int`
+            The amount of todos added
+        """
+        uid = self._get_user(user)
+        data = await self.get_user_data(uid)
+        current: TodoList = data["todos"]
+        added = 0
+        try:
+            async for batch in batches:
+                current.extend(batch)
+                added += len(batch)
+                if progress is not None:
+                    await progress(added)
+        finally:
+            # NOTE the batches added before an error are kept
+            if added:
+                self._mark_dirty(uid, "todos")
+                if data["user_settings"]["autosorting"]:
+                    await self._maybe_autosort(uid)
+                else:
+                    # NOTE appended todos aren't in any order
+                    self._sorted[uid] = None
+                    await self._changed(uid)
+        return added
+
+    async def import_users(self, todos: Dict[int, List[Dict[str, Any]]]) -> int:
+        """|coro|
+
+        Add todos to many users' lists, for bulk imports.
+
+        Each list is sorted at most once and every user is written in a single write
+        before this returns, no matter what the flush policy is
+
+        Arguments
+        ---------
+        todos: Dict[:class:`int`, List[:class:`dict`]]
+            The todos to add, mapped to the id of the user to add them to
+
+        Returns
+        -------
+        :class:`int`
+            The amount of todos added
+        """
+        added = 0
+        changed: List[int] = []
+        for uid, new in todos.items():
+            if not new:
+                continue
+            data = await self.get_user_data(uid)
+            current: TodoList = data["todos"]
+            current.extend(new)
+            added += len(new)
+            settings = data["user_settings"]
+            if settings["autosorting"]:
+                current.sort_by_task(reverse=settings["reverse_sort"])
+                self._sorted[uid] = settings["reverse_sort"]
+            else:
+                self._sorted[uid] = None
+            self._mark_dirty(uid, "todos")
+            changed.append(uid)
+        if changed:
+            await self._flush_many(changed)
+        return added
+
+    async def _flush_many(self, users: List[int]) -> None:
+        """Write every key of these users to config at once, for bulk imports"""
+        # NOTE every `set` rewrites the whole file with the json driver, so a batch of users
+        # goes through the user scope in one write instead of one write per user
+        async with self.config._get_base_group(Config.USER).all() as all_users:
+            for uid in users:
+                data = self._data[uid]
+                all_users[str(uid)] = {**data, "todos": data["todos"].encode()}
+        for uid in users:
+            self._dirty.pop(uid, None)
+
+    async def _maybe_autosort(self, user: User) -> None:
         """An internal function to maybe autosort todos"""
 
         # Okay, so I modified this a bit just for a few reasons
         # A) Todos need to be "sorted" by pinned todos as otherwise the indexes won't match up
         # B) I hate myself
 
-        data = await self.get_user_data(user.id)
-        todos = await self._maybe_fix_todos(user.id)
+        uid = self._get_user(user)
+        data = await self.get_user_data(uid)
+        todos = data["todos"]
         completed = data["completed"]
         if not any([completed, todos]):
             return
@@ -335,99 +730,92 @@ class TodoApi:
         reverse = settings["reverse_sort"]
         autosort = settings["autosorting"]
 
-        if todos:
-            pinned = []
-            extra = []
-            for todo in todos:
-                if todo["pinned"]:
-                    pinned.append(todo)
-                else:
-                    extra.append(todo)
-            if autosort:
-                pinned.sort(key=lambda x: x["task"], reverse=reverse)
-                extra.sort(key=lambda x: x["task"], reverse=reverse)
-            todos = pinned
-            todos.extend(extra)
+        # NOTE pinned todos are always kept first by `TodoList`
+        if todos and autosort:
+            todos.sort_by_task(reverse=reverse)
         if completed and autosort:
             completed.sort(reverse=reverse)
 
         data["completed"] = completed
         data["todos"] = todos
-        await self.set_user_data(user, data)
+        await self.set_user_data(uid, data)
+        self._sorted[uid] = reverse if autosort else None
 
-    async def _maybe_fix_todos(self, user_id: int):
-        """Scan todos and fix the fucked ones"""
-        data = await self.get_user_item(user_id, "todos")
-        if not data:
-            return
-        elif not isinstance(data, list):
-            # Super fucked todos
-            await self.set_user_item(user_id, "todos", [], fix=False)
-            return
-        fixer: List[Tuple[int, dict]] = []
-        for num, todo in enumerate(data):
-            if not isinstance(todo, dict):
-                payload = {"task": todo, "pinned": False, "timestamp": None}
-                fixer.append((num, payload))
-                continue
-            if not todo.get("pinned"):
-                todo["pinned"] = False
-                fixer.append((num, todo))
-                continue
-            if (ts := todo.get("timestamp")) and not isinstance(ts, int):  # type:ignore
-                try:
-                    ts = int(ts)
-                except ValueError:
-                    ts = None
-                todo["timestamp"] = ts
-                fixer.append((num, todo))
-        for index, payload in fixer:
-            try:
-                data.pop(index)
-            except IndexError:
-                pass
-            else:
-                data.insert(index, payload)
-        await self.set_user_item(user_id, "todos", data, fix=False)
-        return data
+    async def query_list(
+        self, user: User, *, regex: bool, query: str, fuzzy: Optional[bool] = None
+    ) -> SearchResults:
+        """|coro|
 
-    async def query_list(self, user: User, *, regex: bool, query: str) -> List[Dict[str, str]]:
-        uid = self._get_user(user)
+        Search a user's todos and completed todos
 
-        async def method(t: Dict[str, Any]) -> bool:
-            task = t["task"]
-            if regex:
-                passed, worked = await self._safe_regex(query, task)
-                if not passed:
-                    raise InvalidRegex
-                return worked
-            return query in task
+        Without regex this uses the user's search index, which is brought up to date
+        with their list first. The best matches come first, with pinned todos before the rest
 
-        todos = await self.get_user_item(uid, "todos")
-        return [x async for x in async_filter(method, todos)]
+        Arguments
+        ---------
+        user: :class:`int`|:class:`User`|:class:`Member`
+            The user whose list to search
+        regex: :class:`bool`
+            Whether the query is a regex pattern
+        query: :class:`str`
+            The words or pattern to search for
+        fuzzy: Optional[:class:`bool`]
+            Whether words can match similarly spelt words. If this isn't given,
+            a fuzzy search is only done when nothing matched otherwise
 
-    async def _safe_regex(self, regex: str, item: str) -> Tuple[bool, bool]:
+        Raises
+        ------
+        InvalidRegex
+            The regex was invalid or took too long
+        """
+        uid = self._get_user(user)
+        data = await self.get_user_data(uid)
+        todos: TodoList = data["todos"]
+        completed: List[str] = data["completed"]
+        if regex:
+            tasks = [t.task for t in todos]
+            passed, indexes = await self._safe_regex(query, tasks + completed)
+            if not passed:
+                raise InvalidRegex
+            split = len(tasks)
+            return SearchResults(
+                [todos[i] for i in indexes if i < split],
+                [completed[i - split] for i in indexes if i >= split],
+            )
+
+        index = self._indexes.get(uid)
+        if index is None:
+            index = self._indexes[uid] = SearchIndex()
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(uid)
+        index.sync(todos, completed, self.revision(uid))
+        results = index.search(query, todos, fuzzy=bool(fuzzy))
+        if not results and fuzzy is None:
+            results = index.search(query, todos, fuzzy=True)
+        return results
+
+    async def _safe_regex(self, regex: str, items: List[str]) -> Tuple[bool, List[int]]:
         # I got this from TrustyJAID's retrigger cog, which is licensed under MIT
         # here is the source for that method:
         # https://github.com/TrustyJAID/Trusty-cogs/blob/master/retrigger/triggerhandler.py#L507-#L552
         # This is licensed under MIT which you can find here:
         # https://github.com/TrustyJAID/Trusty-cogs/blob/master/LICENSE.txt
+
+        # NOTE the whole list goes to the worker at once, so the timeout is for the entire search
         try:
-            process = self._pool.apply_async(re.search, (regex, item))
-            task = functools.partial(process.get, timeout=2.0)
-            new_task = await self._loop.run_in_executor(None, task)
-            search = await asyncio.wait_for(new_task, timeout=20.0)
-        except mp.TimeoutError:
+            indexes = await self._sandbox.search_many(regex, items, timeout=2.0)
+        except RegexTimeout:
             log.debug("Regex processing took too long.")
-            return False, False
-        except asyncio.TimeoutError:
-            log.debug("Regex asycnio took too long.")
-            return False, False
+            return False, []
+        except re.error:
+            return False, []
         except ValueError as e:
             log.error("Value error in `_safe_regex`:", exc_info=e)
-            return False, False
+            return False, []
         except Exception as e:
             log.error("General exception in `_safe_regex`:", exc_info=e)
-            return True, False  # Not gonna return this tbh
+            return True, []  # Not gonna return this tbh
         else:
-            return True, search
+            return True, indexes
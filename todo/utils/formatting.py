@@ -1,9 +1,21 @@
 # Copyright (c) 2021 - Jojo#7791
 # Licensed under MIT
 
-from typing import TYPE_CHECKING, List
+from typing import Iterable, Iterator
 
-__all__ = ["_format_todos", "_format_completed", "_build_underline"]
+from redbot.core.utils.chat_formatting import pagify
+
+from .general import TimestampFormats, timestamp_format
+from .search import SearchResults
+from .storage import TodoRecord
+
+__all__ = [
+    "_format_todos",
+    "_format_completed",
+    "_format_results",
+    "_build_underline",
+    "_paginate",
+]
 
 
 def _build_underline(data: str, md: bool = False, emoji: bool = False) -> str:
@@ -18,11 +30,16 @@ def _build_underline(data: str, md: bool = False, emoji: bool = False) -> str:
     return "\n" + "-" * (len(data) + add)
 
 
-async def _format_todos(pinned: List[str], other: List[str], **settings) -> List[str]:
-    """An enternal function to format a user's todos"""
+def _format_todos(todos: Iterable[TodoRecord], **settings) -> Iterator[str]:
+    """An internal function to format a user's todos
+
+    This is a generator so only the todos on the pages being looked at get formatted.
+    `todos` have to be pinned first, which is how `TodoList` keeps them
+    """
     pretty = settings.get("pretty_todos", False)
     use_md = settings.get("use_markdown", False)
     number = settings.get("number_todos", False)
+    timestamp = settings.get("use_timestamps", False) and not use_md
     emoji = settings.get("todo_emoji", "\N{LARGE GREEN SQUARE}")
     if emoji is None or emoji.startswith("<") and use_md:  # Custom emoji
         emoji = "\N{LARGE GREEN SQUARE}"
@@ -30,40 +47,41 @@ async def _format_todos(pinned: List[str], other: List[str], **settings) -> List
     if cat_emoji is None or cat_emoji.startswith("<") and use_md:
         cat_emoji = "\N{RADIO BUTTON}"
     fmt = "" if use_md else "**"
-    should_insert = len(pinned) > 0
-    should_insert_todos = len(other) > 0
-    to_insert = (
-        len(pinned) + 1
-    )  # This gives me back the last index + 1 allowing me to insert the "other todos" into it
-    pinned.extend(other)
-    ret = []
-    for num, task in enumerate(pinned, 1):
+    # NOTE the headers are yielded when the first todo of a section comes up
+    has_pinned = False
+    has_other = False
+    for num, todo in enumerate(todos, 1):
+        if todo["pinned"]:
+            if not has_pinned:
+                has_pinned = True
+                yield (
+                    f"\n\N{PUSHPIN} {fmt}Pinned todos{fmt}"
+                    + _build_underline("📌 Pinned todos", use_md, True)
+                )
+        elif not has_other:
+            has_other = True
+            if has_pinned:
+                yield (
+                    f"\n{cat_emoji} {fmt}Other todos{fmt}"
+                    + _build_underline("🔘 Other todos", use_md, True)
+                )
+            else:
+                yield f"{cat_emoji} {fmt}Todos{fmt}" + _build_underline("🔘 Todos", use_md, True)
+        task = todo["task"]
+        if timestamp and (ts := todo.get("timestamp")):
+            task = f"{task} - {timestamp_format(ts, ts_format=TimestampFormats.RELATIVE_TIME)}"
         if number:
             task = f"{num}. {task}"
         if pretty:
             task = f"{emoji} {task}"
-        ret.append(task)
-    if should_insert:
-        ret.insert(
-            0,
-            f"\n\N{PUSHPIN} {fmt}Pinned todos{fmt}"
-            + _build_underline("📌 Pinned todos", use_md, True),
-        )
-        if should_insert_todos:
-            ret.insert(
-                to_insert,
-                f"\n{cat_emoji} {fmt}Other todos{fmt}"
-                + _build_underline("🔘 Other todos", use_md, True),
-            )
-    else:
-        ret.insert(
-            0,
-            f"{cat_emoji} {fmt}Todos{fmt}" + _build_underline("🔘 Todos", use_md, True),
-        )
-    return ret
+        yield task
+    if not has_pinned and not has_other:
+        yield f"{cat_emoji} {fmt}Todos{fmt}" + _build_underline("🔘 Todos", use_md, True)
 
 
-async def _format_completed(completed: List[str], combined: bool = False, **settings) -> List[str]:
+def _format_completed(
+    completed: Iterable[str], combined: bool = False, **settings
+) -> Iterator[str]:
     pretty = settings.get("pretty_todos", False)
     number = settings.get("number_todos", False)
     use_md = settings.get("use_markdown", False)
@@ -75,19 +93,45 @@ async def _format_completed(completed: List[str], combined: bool = False, **sett
     if not cat_emoji or cat_emoji.startswith("<") and use_md:
         cat_emoji = "\N{BALLOT BOX WITH CHECK}"
     fmt = "" if settings.get("use_markdown") else "**"
-    ret = []
+    if combined:
+        header_emoji = "✅" if use_md else "☑"
+        data = f"{header_emoji} Completed todos"
+        yield (
+            f"\n{cat_emoji} \N{VARIATION SELECTOR-16} {fmt}Completed todos{fmt}"
+            + _build_underline(data, use_md, True)
+        )
     for num, task in enumerate(completed, 1):
         if number:
             task = f"{num}. {task}"
         if pretty:
             task = f"{emoji} {task}"
-        ret.append(task)
-    if combined:
-        emoji = "✅" if use_md else "☑"
-        data = f"{emoji} Completed todos"
-        ret.insert(
-            0,
-            f"\n{cat_emoji} \N{VARIATION SELECTOR-16} {fmt}Completed todos{fmt}"
-            + _build_underline(data, use_md, True),
-        )
-    return ret
+        yield task
+
+
+def _format_results(results: SearchResults, **settings) -> Iterator[str]:
+    """An internal function to format the todos and completed todos found by a search"""
+    if results.todos:
+        yield from _format_todos(results.todos, **settings)
+    if results.completed:
+        yield from _format_completed(results.completed, combined=True, **settings)
+
+
+def _paginate(lines: Iterable[str], page_length: int = 300) -> Iterator[str]:
+    """Split lines into pages as they're needed
+
+    Pages are only built out of whole lines, lines that are too long for a page
+    are split by `pagify`. Only the lines for the pages being looked at are read
+    """
+    # NOTE pagify shortens every page by 8 by default
+    limit = page_length - 8
+    buffer = []
+    size = 0
+    for line in lines:
+        if buffer and size + len(line) + 1 > limit:
+            yield from pagify("\n".join(buffer), page_length=page_length)
+            buffer = []
+            size = 0
+        buffer.append(line)
+        size += len(line) + 1
+    if buffer:
+        yield from pagify("\n".join(buffer), page_length=page_length)
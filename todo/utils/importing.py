@@ -0,0 +1,76 @@
+# Copyright (c) 2021 - Jojo#7791
+# Licensed under MIT
+
+# Streaming todos in from a file
+# Attachments are downloaded and decoded a chunk at a time and handed out in batches,
+# so a file with tens of thousands of todos never has to be in memory as a whole
+
+from __future__ import annotations
+
+import codecs
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+import discord
+
+__all__ = ["ImportResult", "iter_attachment_lines", "parse_todos"]
+
+# NOTE the same as the most a todo can be edited to
+_MAX_TASK_LENGTH = 2000
+
+
+class ImportResult:
+    __slots__ = ("parsed", "skipped")
+
+    def __init__(self):
+        self.parsed: int = 0
+        self.skipped: int = 0
+
+
+async def iter_attachment_lines(
+    attachment: discord.Attachment, *, chunk_size: int = 64 * 1024
+) -> AsyncIterator[str]:
+    """Stream the lines of an attachment without downloading the entire file first"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(attachment.url) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                pending += decoder.decode(chunk)
+                *lines, pending = pending.split("\n")
+                for line in lines:
+                    yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def parse_todos(
+    lines: AsyncIterable[str],
+    result: ImportResult,
+    *,
+    timestamp: Optional[int] = None,
+    batch_size: int = 500,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Turn a stream of lines into batches of todos
+
+    Blank lines are ignored, and lines that are too long get skipped and counted in `result`
+    """
+    batch: List[Dict[str, Any]] = []
+    async for line in lines:
+        line = line.rstrip("\r")
+        if not line.strip():
+            continue
+        task = line.replace("\\n", "\n")
+        if len(task) > _MAX_TASK_LENGTH:
+            result.skipped += 1
+            continue
+        batch.append({"pinned": False, "task": task, "timestamp": timestamp})
+        if len(batch) >= batch_size:
+            result.parsed += len(batch)
+            yield batch
+            batch = []
+    if batch:
+        result.parsed += len(batch)
+        yield batch
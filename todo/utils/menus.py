@@ -6,7 +6,7 @@ from __future__ import annotations
 import datetime
 import discord
 
-from typing import List, Union, Dict, Optional, Any, TYPE_CHECKING
+from typing import Iterable, Union, Dict, Optional, Any, TYPE_CHECKING
 from abc import ABC
 
 from contextlib import suppress
@@ -16,6 +16,7 @@ from redbot.core.utils.chat_formatting import box
 
 from .api import TodoApi
 from .general import timestamp_format, TimestampFormats
+from .render import RenderedPages
 
 
 if TYPE_CHECKING:
@@ -26,16 +27,37 @@ __all__ = ["TodoPages", "TodoMenu", "TodoPrivateMenu", "PrivateMenuStarter", "Vi
 
 
 class TodoPages:
-    def __init__(self, data: List[str], title: str, user_settings: Dict[str, Any]):
-        self.data = data
+    """A menu's source
+
+    Arguments
+    ------------
+    data: the pages, either already rendered or an iterable which is rendered as it's looked at
+    """
+
+    def __init__(
+        self, data: Union[RenderedPages, Iterable[str]], title: str, user_settings: Dict[str, Any]
+    ):
+        self.pages = data if isinstance(data, RenderedPages) else RenderedPages(data)
         self.title = title
-        self.max_pages = len(data)
         self.user_settings = user_settings
 
+    @property
+    def max_pages(self) -> Optional[int]:
+        return self.pages.max_pages
+
+    def has_page(self, page_number: int) -> bool:
+        return self.pages.has_page(page_number)
+
+    def checked_page(self, page_number: int) -> int:
+        return self.pages.checked_page(page_number)
+
     async def format_page(self, page: str, view: _MenuMixin) -> Union[str, discord.Embed]:
         ctx: Optional[commands.Context] = view.ctx
         page = page if not self.user_settings["use_markdown"] else box(page, lang="md")
-        footer = f"Page {view.current_page + 1}/{self.max_pages}"
+        max_pages = self.max_pages
+        footer = f"Page {view.current_page + 1}"
+        if max_pages is not None:
+            footer += f"/{max_pages}"
         if self._embed_requested(ctx):
             emb = discord.Embed(
                 title=self.title,
@@ -55,7 +77,7 @@ class TodoPages:
         return True
 
     async def get_page(self, page_number: int) -> str:
-        return self.data[page_number]
+        return self.pages.get(page_number)
 
 
 class _ButtonMixin(ABC):
@@ -153,8 +175,9 @@ class _MenuMixin(discord.ui.View, ABC):
     def _add_buttons(self, *, stop_button: bool = True) -> None:
         """DRY"""
 
-        single_disabled = self.source.max_pages == 1
-        multi_disabled = self.source.max_pages < 5
+        # NOTE this only builds the first 5 pages
+        single_disabled = not self.source.has_page(1)
+        multi_disabled = not self.source.has_page(4)
 
         self.add_item(FirstPageButton(multi_disabled))
         self.add_item(PreviousPageButton(single_disabled))
@@ -206,14 +229,8 @@ class TodoMenu(_MenuMixin):
         await self.msg.edit(**kwargs)
 
     async def show_checked_page(self, page_number: int, interaction: discord.Interaction) -> None:
-        max_pages = self.source.max_pages
         try:
-            if max_pages > page_number >= 0:
-                await self.show_page(page_number, interaction)
-            elif max_pages <= page_number:
-                await self.show_page(0, interaction)
-            else:
-                await self.show_page(max_pages - 1, interaction)
+            await self.show_page(self.source.checked_page(page_number), interaction)
         except IndexError:
             pass
 
@@ -234,16 +251,8 @@ class TodoPrivateMenu(_MenuMixin):
         self._add_buttons(stop_button=False)
 
     async def show_checked_page(self, page_number: int, interaction: discord.Interaction) -> None:
-        max_pages = (
-            self.source.max_pages
-        )  # no need to do this but writing `self.source.` is tough!!!!
         try:
-            if max_pages > page_number >= 0:
-                await self.show_page(page_number, interaction)
-            elif max_pages <= page_number:
-                await self.show_page(0, interaction)
-            else:
-                await self.show_page(max_pages - 1, interaction)
+            await self.show_page(self.source.checked_page(page_number), interaction)
         except IndexError:
             pass
 
@@ -348,7 +357,7 @@ class EditModal(discord.ui.Modal):
             style=discord.TextStyle.long,
             label="Edit your todo",
             placeholder="Write a new todo",
-            default=x if not isinstance((x := self.todo), dict) else self.todo["task"],
+            default=x if isinstance((x := self.todo), str) else self.todo["task"],
             required=True,
             min_length=1,
             max_length=2000,
@@ -358,7 +367,7 @@ class EditModal(discord.ui.Modal):
 
     async def on_submit(self, interaction: discord.Interaction) -> None:
         new_todo = self.text.value
-        if isinstance(self.todo, dict):
+        if not isinstance(self.todo, str):
             self.todo["task"] = new_todo
         else:
             self.todo = new_todo
@@ -448,7 +457,7 @@ class ViewTodo(discord.ui.View):
         key = "completed" if self.completed else "todos"
         todos: list = await self.cache.get_user_item(self.ctx.author, key)
         todos[self.index - 1] = data
-        await self.cache.set_user_item(self.ctx.author, key, todos, fix=False)
+        await self.cache.set_user_item(self.ctx.author, key, todos)
 
     async def _delete_todo(self) -> None:
         self.stop()
@@ -0,0 +1,133 @@
+# Copyright (c) 2021 - Jojo#7791
+# Licensed under MIT
+
+# Pages of a list that have been rendered, and a cache of them
+# Pages are built from a generator as they're looked at, and the cache keeps them around
+# so listing the same todos again doesn't format anything
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+__all__ = ["RenderedPages", "RenderCache"]
+
+# NOTE (user id, revision, settings, view)
+RenderKey = Tuple[int, int, Tuple[Tuple[str, Any], ...], str]
+
+
+class RenderedPages:
+    """The pages of a list, which are only built once they're needed
+
+    Arguments
+    ------------
+    pages: the pages, this can be a generator in which case pages are pulled from it when needed
+    and kept so going back to a page doesn't build it again
+    """
+
+    def __init__(self, pages: Iterable[str]):
+        self._pages: List[str] = []
+        self._source: Optional[Iterator[str]] = iter(pages)
+        self.size = 0
+        # NOTE set by the cache holding these pages, called with the size of every new page
+        self.on_grow: Optional[Callable[[int], None]] = None
+
+    @property
+    def max_pages(self) -> Optional[int]:
+        """The amount of pages, or `None` if not every page has been built yet"""
+        return len(self._pages) if self._source is None else None
+
+    def _fill(self, page_number: Optional[int]) -> None:
+        """Build pages up to and including `page_number`, or every page if it's `None`"""
+        if self._source is None:
+            return
+        while page_number is None or len(self._pages) <= page_number:
+            try:
+                page = next(self._source)
+            except StopIteration:
+                self._source = None
+                return
+            self._pages.append(page)
+            self.size += len(page)
+            if self.on_grow is not None:
+                self.on_grow(len(page))
+
+    def has_page(self, page_number: int) -> bool:
+        self._fill(page_number)
+        return page_number < len(self._pages)
+
+    def checked_page(self, page_number: int) -> int:
+        """Get the page to show for `page_number`, wrapping around either end"""
+        if page_number >= 0 and self.has_page(page_number):
+            return page_number
+        elif page_number >= 0:
+            return 0
+        # NOTE this is the only time every page gets built
+        self._fill(None)
+        return max(len(self._pages) - 1, 0)
+
+    def get(self, page_number: int) -> str:
+        self._fill(None if page_number < 0 else page_number)
+        return self._pages[page_number]
+
+
+class RenderCache:
+    """An LRU cache of rendered pages
+
+    Entries are keyed by the user, the revision of their data, their settings
+    and what's being shown, so a change to any of those misses the cache instead of
+    showing outdated pages. Old revisions aren't removed, they just fall out of the cache
+
+    Arguments
+    ------------
+    max_size: how many characters of pages can be kept
+    """
+
+    def __init__(self, *, max_size: int = 2_000_000):
+        self.max_size = max_size
+        self.size = 0
+        self._cache: OrderedDict[RenderKey, RenderedPages] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @staticmethod
+    def key(user_id: int, revision: int, settings: Dict[str, Any], view: str) -> RenderKey:
+        # NOTE settings are all str, int, bool or None so they can be hashed as they are
+        return user_id, revision, tuple(sorted(settings.items())), view
+
+    def get(self, key: RenderKey) -> Optional[RenderedPages]:
+        pages = self._cache.get(key)
+        if pages is not None:
+            self._cache.move_to_end(key)
+        return pages
+
+    def put(self, key: RenderKey, pages: RenderedPages) -> None:
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._detach(old)
+        self._cache[key] = pages
+        self.size += pages.size
+        pages.on_grow = self._grow
+        self._evict()
+
+    def _grow(self, amount: int) -> None:
+        # NOTE pages get built after they're cached, so the budget is checked as they are
+        self.size += amount
+        self._evict()
+
+    def _detach(self, pages: RenderedPages) -> None:
+        # NOTE a menu could still be building these, which shouldn't count towards the cache
+        pages.on_grow = None
+        self.size -= pages.size
+
+    def _evict(self) -> None:
+        while self.size > self.max_size and len(self._cache) > 1:
+            _, pages = self._cache.popitem(last=False)
+            self._detach(pages)
+
+    def clear(self) -> None:
+        for pages in self._cache.values():
+            pages.on_grow = None
+        self._cache.clear()
+        self.size = 0
@@ -0,0 +1,177 @@
+# Copyright (c) 2021 - Jojo#7791
+# Licensed under MIT
+
+# An inverted index of the words in a user's todos and completed todos
+# The index isn't rebuilt when the list changes, instead it's compared against the list
+# the next time it's searched and only the todos that changed get tokenized again
+
+from __future__ import annotations
+
+import bisect
+import difflib
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .storage import TodoList, TodoRecord
+
+__all__ = ["SearchIndex", "SearchResults"]
+
+_word_re = re.compile(r"\w+")
+# NOTE todos are keyed by their id and completed todos by their text,
+# as completed todos don't have ids and the same text can be completed more than once
+DocKey = Union[int, str]
+# NOTE how much a query word is worth when it matches a word exactly, by prefix or fuzzily
+_EXACT, _PREFIX, _FUZZY = 3.0, 2.0, 1.0
+# NOTE extra score for todos that contain the whole query as it was typed
+_PHRASE = 2.0
+
+
+def _tokenize(text: str) -> List[str]:
+    return _word_re.findall(text.lower())
+
+
+class SearchResults:
+    """The todos and completed todos that matched a search, best matches first"""
+
+    __slots__ = ("todos", "completed")
+
+    def __init__(self, todos: List[TodoRecord], completed: List[str]):
+        self.todos = todos
+        self.completed = completed
+
+    def __bool__(self) -> bool:
+        return bool(self.todos or self.completed)
+
+    def __len__(self) -> int:
+        return len(self.todos) + len(self.completed)
+
+
+class SearchIndex:
+    """An inverted index of one user's todos
+
+    `revision` is the revision of the user's data this was last synced with,
+    see :meth:`TodoApi.revision`
+    """
+
+    def __init__(self):
+        self.revision: Optional[int] = None
+        self._postings: Dict[str, Dict[DocKey, int]] = {}
+        self._todos: Dict[int, str] = {}
+        self._completed: Counter[str] = Counter()
+        self._vocabulary: Optional[List[str]] = None
+
+    def _add(self, key: DocKey, text: str) -> None:
+        for token, count in Counter(_tokenize(text)).items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocabulary = None
+            postings[key] = count
+
+    def _remove(self, key: DocKey, text: str) -> None:
+        for token in set(_tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+
+    def sync(self, todos: TodoList, completed: Iterable[str], revision: int) -> None:
+        """Update the index to match the list, only tokenizing what changed since the last sync"""
+        if revision == self.revision:
+            return
+        seen: Set[int] = set()
+        for record in todos:
+            seen.add(record.id)
+            old = self._todos.get(record.id)
+            if old == record.task:
+                continue
+            if old is not None:
+                self._remove(record.id, old)
+            self._add(record.id, record.task)
+            self._todos[record.id] = record.task
+        for record_id in [i for i in self._todos if i not in seen]:
+            self._remove(record_id, self._todos.pop(record_id))
+
+        current = Counter(completed)
+        for task in self._completed.keys() - current.keys():
+            self._remove(task, task)
+        for task in current.keys() - self._completed.keys():
+            self._add(task, task)
+        self._completed = current
+        self.revision = revision
+
+    def _expand(self, word: str, *, prefix: bool, fuzzy: bool) -> List[Tuple[str, float]]:
+        """Get the indexed words a query word matches and how much each is worth"""
+        ret: Dict[str, float] = {}
+        if word in self._postings:
+            ret[word] = _EXACT
+        if prefix or fuzzy:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self._postings)
+            vocabulary = self._vocabulary
+        if prefix:
+            index = bisect.bisect_left(vocabulary, word)
+            while index < len(vocabulary) and vocabulary[index].startswith(word):
+                ret.setdefault(vocabulary[index], _PREFIX)
+                index += 1
+        if fuzzy:
+            for match in difflib.get_close_matches(word, vocabulary, n=5, cutoff=0.75):
+                ret.setdefault(match, _FUZZY)
+        return list(ret.items())
+
+    def search(
+        self, query: str, todos: TodoList, *, prefix: bool = True, fuzzy: bool = False
+    ) -> SearchResults:
+        """Get the todos and completed todos containing every word in `query`
+
+        Arguments
+        ------------
+        prefix: whether words in the query can match the start of a longer word
+        fuzzy: whether words in the query can match words that are spelt similarly
+        """
+        words = _tokenize(query)
+        if not words:
+            return SearchResults([], [])
+        scores: Dict[DocKey, float] = {}
+        for num, word in enumerate(dict.fromkeys(words)):
+            matched: Dict[DocKey, float] = {}
+            for token, weight in self._expand(word, prefix=prefix, fuzzy=fuzzy):
+                for key, count in self._postings[token].items():
+                    matched[key] = max(matched.get(key, 0.0), weight * count)
+            # NOTE every word has to match, so only keep what matched every word so far
+            if num == 0:
+                scores = matched
+            else:
+                scores = {
+                    key: value + matched[key] for key, value in scores.items() if key in matched
+                }
+            if not scores:
+                return SearchResults([], [])
+
+        phrase = query.lower()
+        position = {record.id: index for index, record in enumerate(todos)}
+        found_todos: List[Tuple[float, int, TodoRecord]] = []
+        found_completed: List[Tuple[float, str]] = []
+        for key, score in scores.items():
+            if isinstance(key, int):
+                record = todos.get_by_id(key)
+                if record is None:
+                    continue
+                if phrase in record.task.lower():
+                    score += _PHRASE
+                found_todos.append((score, position[key], record))
+            else:
+                if phrase in key.lower():
+                    score += _PHRASE
+                found_completed.append((score, key))
+        # NOTE pinned todos stay first so the results can be shown like a normal list
+        found_todos.sort(key=lambda x: (not x[2].pinned, -x[0], x[1]))
+        found_completed.sort(key=lambda x: (-x[0], x[1]))
+        completed: List[str] = []
+        for _, task in found_completed:
+            completed.extend([task] * self._completed[task])
+        return SearchResults([x[2] for x in found_todos], completed)
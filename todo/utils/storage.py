@@ -0,0 +1,233 @@
+# Copyright (c) 2021 - Jojo#7791
+# Licensed under MIT
+
+# How a user's todos are kept in memory
+# Each todo is a slotted record with an id that doesn't change when the list gets reordered,
+# and the order of the list is two arrays of ids, one for the pinned todos and one for the rest.
+# Config still gets the list of dicts it always has, with the id added
+
+from __future__ import annotations
+
+from collections.abc import MutableSequence
+from typing import Any, Dict, Final, Iterable, Iterator, List, Optional, Tuple, Union, overload
+
+__all__ = ["TodoRecord", "TodoList"]
+
+_fields: Final[Tuple[str, ...]] = ("task", "pinned", "timestamp")
+
+
+class TodoRecord:
+    """A single todo
+
+    This can be used like the dicts todos used to be, so `todo["task"]` still works
+    """
+
+    __slots__ = ("id", "task", "pinned", "timestamp")
+
+    def __init__(
+        self, id: int, task: str, pinned: bool = False, timestamp: Optional[int] = None
+    ):
+        self.id = id
+        self.task = task
+        self.pinned = pinned
+        self.timestamp = timestamp
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _fields
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _fields else default
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TodoRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (
+            f"<TodoRecord id={self.id} task={self.task!r} "
+            f"pinned={self.pinned} timestamp={self.timestamp}>"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "task": self.task,
+            "pinned": self.pinned,
+            "timestamp": self.timestamp,
+            "id": self.id,
+        }
+
+
+TodoLike = Union[TodoRecord, Dict[str, Any]]
+
+
+class TodoList(MutableSequence):
+    """A user's todos, with the pinned todos always first
+
+    Indexing works on the combined order, like the old list did.
+    Inserting puts a todo in its own section, so a pinned todo can't end up after an unpinned one
+    """
+
+    def __init__(self):
+        self._records: Dict[int, TodoRecord] = {}
+        self.pinned: List[int] = []
+        self.other: List[int] = []
+        self._next_id = 1
+
+    @classmethod
+    def decode(cls, raw: Iterable[TodoLike]) -> TodoList:
+        """Build a list from what's saved in config, todos without an id are given one"""
+        self = cls()
+        items = list(raw)
+        self._next_id = 1 + max((_id_of(item) or 0 for item in items), default=0)
+        for item in items:
+            self.append(item)
+        return self
+
+    def encode(self) -> List[Dict[str, Any]]:
+        """Get the list of dicts that gets saved to config"""
+        return [record.to_dict() for record in self]
+
+    def _to_record(self, value: TodoLike) -> TodoRecord:
+        if isinstance(value, TodoRecord):
+            record = value
+        else:
+            record = TodoRecord(
+                _id_of(value) or 0,
+                value["task"],
+                bool(value.get("pinned")),
+                value.get("timestamp"),
+            )
+        if not record.id or record.id in self._records:
+            record.id = self._next_id
+        self._next_id = max(self._next_id, record.id + 1)
+        return record
+
+    def _locate(self, index: int) -> Tuple[List[int], int]:
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("todo index out of range")
+        if index < len(self.pinned):
+            return self.pinned, index
+        return self.other, index - len(self.pinned)
+
+    def __len__(self) -> int:
+        return len(self.pinned) + len(self.other)
+
+    def __iter__(self) -> Iterator[TodoRecord]:
+        # NOTE menus read from this lazily, so the order is copied in case the list changes
+        records = self._records
+        for record_id in [*self.pinned, *self.other]:
+            if (record := records.get(record_id)) is not None:
+                yield record
+
+    @overload
+    def __getitem__(self, index: int) -> TodoRecord: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[TodoRecord]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        ids, actual = self._locate(index)
+        return self._records[ids[actual]]
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            raise TypeError("TodoList does not support slice assignment")
+        ids, actual = self._locate(index)
+        del self._records[ids.pop(actual)]
+        record = self._to_record(value)
+        # NOTE the old record could be the same object with `pinned` already changed,
+        # so where the id was is the only way to know which section it was in
+        if record.pinned == (ids is self.pinned):
+            ids.insert(actual, record.id)
+            self._records[record.id] = record
+            return
+        self._insert_record(index, record)
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            self.remove_indexes(range(len(self))[index])
+            return
+        ids, actual = self._locate(index)
+        del self._records[ids.pop(actual)]
+
+    def insert(self, index: int, value: TodoLike) -> None:
+        self._insert_record(index, self._to_record(value))
+
+    def _insert_record(self, index: int, record: TodoRecord) -> None:
+        if index < 0:
+            index = max(len(self) + index, 0)
+        self._records[record.id] = record
+        if record.pinned:
+            self.pinned.insert(min(index, len(self.pinned)), record.id)
+        else:
+            self.other.insert(max(index - len(self.pinned), 0), record.id)
+
+    def append(self, value: TodoLike) -> None:
+        # NOTE the base class goes through `insert(len(self), ...)`, this skips the clamping
+        record = self._to_record(value)
+        self._records[record.id] = record
+        (self.pinned if record.pinned else self.other).append(record.id)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self.pinned.clear()
+        self.other.clear()
+
+    def get_by_id(self, record_id: int) -> Optional[TodoRecord]:
+        return self._records.get(record_id)
+
+    def remove_indexes(self, indexes: Iterable[int]) -> List[TodoRecord]:
+        """Remove the todos at these indexes, returning them in the order they were given
+
+        Indexes that are out of range are skipped. This is linear no matter how many get removed
+        """
+        removed: Dict[int, TodoRecord] = {}
+        for index in indexes:
+            try:
+                record = self[index]
+            except IndexError:
+                continue
+            removed.setdefault(record.id, record)
+        if removed:
+            self.pinned = [i for i in self.pinned if i not in removed]
+            self.other = [i for i in self.other if i not in removed]
+            for record_id in removed:
+                del self._records[record_id]
+        return list(removed.values())
+
+    def sort_by_task(self, *, reverse: bool = False) -> None:
+        """Sort the pinned and other todos by their task"""
+        records = self._records
+        self.pinned.sort(key=lambda i: records[i].task, reverse=reverse)
+        self.other.sort(key=lambda i: records[i].task, reverse=reverse)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TodoList):
+            return self.encode() == other.encode()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<TodoList pinned={len(self.pinned)} other={len(self.other)}>"
+
+
+def _id_of(item: TodoLike) -> Optional[int]:
+    if isinstance(item, TodoRecord):
+        return item.id
+    value = item.get("id")
+    return value if isinstance(value, int) else None